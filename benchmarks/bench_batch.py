@@ -0,0 +1,85 @@
+"""Columnar batch decoding against decoding frame by frame.
+
+Decodes an hour of simulated frames per subDevNum with decode_frame in a loop
+and with decode_batch over the joined buffer, then runs the backfill
+reduction to hourly statistics both ways (per reading as before, per batch
+as now) and checks that both give the same statistics.
+
+Usage: python benchmarks/bench_batch.py [frames]
+"""
+from __future__ import annotations
+
+import pathlib
+import random
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from simulator import build_frame  # noqa: E402
+
+from custom_components.econest.backfill import HourlyAggregator  # noqa: E402
+from custom_components.econest.batch import decode_batch, decode_batches  # noqa: E402
+from custom_components.econest.decoder import decode_frame  # noqa: E402
+
+
+class LegacyHourlyAggregator(HourlyAggregator):
+    """The backfill aggregator as it was, one dict update per reading."""
+
+    def add(self, frame):
+        hour = frame.timestamp - frame.timestamp % 3600
+        fields = frame.fields
+        for sensor_name, index in frame.layout.slots:
+            value = fields[index]
+            if sensor_name.endswith("-Energy"):
+                self.energy[(sensor_name, hour)] = value
+                continue
+            stats = self.power.get((sensor_name, hour))
+            if stats is None:
+                self.power[(sensor_name, hour)] = [value, value, value, 1]
+            else:
+                stats[0] = min(stats[0], value)
+                stats[1] = max(stats[1], value)
+                stats[2] += value
+                stats[3] += 1
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def per_frame(frames):
+    aggregator = LegacyHourlyAggregator()
+    for frame in frames:
+        aggregator.add(decode_frame(frame))
+    return aggregator.statistics()
+
+
+def batched(frames):
+    aggregator = HourlyAggregator()
+    for batch in decode_batches(frames):
+        aggregator.add(batch)
+    return aggregator.statistics()
+
+
+def main(frames=3600):
+    print(f"{'subDevNum':>9} {'decode loop':>12} {'decode_batch':>13} {'backfill loop':>14} {'backfill batch':>15}")
+    for sub_dev_num in (0, 4, 16):
+        rng = random.Random(sub_dev_num)
+        data = [build_frame(sub_dev_num, 1_700_000_000 + ind, rng) for ind in range(frames)]
+        buffer = b"".join(data)
+        loop, _ = timed(lambda: [decode_frame(frame) for frame in data])
+        batch, _ = timed(decode_batch, buffer)
+        legacy_time, legacy = timed(per_frame, data)
+        batch_time, result = timed(batched, data)
+        assert legacy == result, "batch statistics differ from per frame statistics"
+        print(
+            f"{sub_dev_num:>9} {loop * 1e3:>9.1f} ms {batch * 1e3:>10.1f} ms"
+            f" {legacy_time * 1e3:>11.1f} ms {batch_time * 1e3:>12.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
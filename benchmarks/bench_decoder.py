@@ -0,0 +1,171 @@
+"""Compare the compiled frame decoder against the original analysis_data.
+
+Checks first that both read the same values from random frames with 0, 1, 4
+and 16 sub devices, also with disabled channels, then measures speed.
+
+Usage: python benchmarks/bench_decoder.py [frames]
+"""
+from __future__ import annotations
+
+import importlib.util
+import pathlib
+import random
+import struct
+import sys
+import time
+import tracemalloc
+
+COMPONENT_DIR = pathlib.Path(__file__).resolve().parent.parent / "custom_components" / "econest"
+
+
+def load_component_module(name):
+    """Load a module of the integration that does not need Home Assistant."""
+    spec = importlib.util.spec_from_file_location(f"econest_{name}", COMPONENT_DIR / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+decoder = load_component_module("decoder")
+
+from simulator import build_frame  # noqa: E402
+
+
+def legacy_analysis_data(data):
+    """analysis_data as it was before the compiled decoder."""
+    offset = 0
+    econest_ws_pkg_head_format = "<IIII"
+    econest_ws_pkg_head_size = struct.calcsize(econest_ws_pkg_head_format)
+    version, crc, type_, length = struct.unpack_from(econest_ws_pkg_head_format, data, offset)
+    offset += econest_ws_pkg_head_size
+    if type_ != 2:
+        return None
+    econestWsPkgHead = {"version": version, "crc": crc, "type": type_, "length": length}
+    sample_data_ws_payload_format = "<IB"
+    sample_data_ws_payload_size = struct.calcsize(sample_data_ws_payload_format)
+    timeStamp, subDevNum = struct.unpack_from(sample_data_ws_payload_format, data, offset)
+    offset += sample_data_ws_payload_size
+    main_ch_data_format = "<iI"
+    main_ch_data_size = struct.calcsize(main_ch_data_format)
+    main_power, main_energy = struct.unpack_from(main_ch_data_format, data, offset)
+    offset += main_ch_data_size
+    mainChData = {"Power": main_power, "Energy": main_energy}
+    subDevChData = []
+    for _ in range(1, subDevNum + 1):
+        sub_dev_number_format = "<B"
+        sub_dev_number_size = struct.calcsize(sub_dev_number_format)
+        number = struct.unpack_from(sub_dev_number_format, data, offset)[0]
+        offset += sub_dev_number_size
+        ch_data_format = "<iI"
+        ch_data_size = struct.calcsize(ch_data_format)
+        chDatas = []
+        for _ in range(10):
+            power, energy = struct.unpack_from(ch_data_format, data, offset)
+            offset += ch_data_size
+            chDatas.append({"Power": power, "Energy": energy})
+        subDevChData.append({"number": number, "chDatas": chDatas})
+    sampleDataWsPayload = {
+        "timeStamp": timeStamp,
+        "subDevNum": subDevNum,
+        "mainChData": mainChData,
+        "subDevChData": subDevChData,
+    }
+    return {"econestWsPkgHead": econestWsPkgHead, "sampleDataWsPayload": sampleDataWsPayload}
+
+
+def legacy_readings(legacy, disabled):
+    """(sensor name, value) of every reading the legacy result holds, in slot order."""
+    payload = legacy["sampleDataWsPayload"]
+    readings = [(f"ecoMain-{key}", value) for key, value in payload["mainChData"].items()]
+    for sub_ind, sub_dev in enumerate(payload["subDevChData"]):
+        for ch_ind, ch_data in enumerate(sub_dev["chDatas"]):
+            name = decoder.channel_name(sub_ind, ch_ind)
+            if name not in disabled:
+                readings.extend((f"{name}-{key}", value) for key, value in ch_data.items())
+    return readings
+
+
+def mismatches(frame, disabled=frozenset()):
+    """Return what the compiled decoder reads differently from the legacy one."""
+    legacy = legacy_analysis_data(frame)
+    compiled = decoder.decode_frame(frame, disabled)
+    head = legacy["econestWsPkgHead"]
+    payload = legacy["sampleDataWsPayload"]
+    fields = compiled.fields
+    problems = []
+    expected = [
+        ("header", (head["version"], head["crc"], head["length"])),
+        ("timeStamp", payload["timeStamp"]),
+        ("subDevNum", payload["subDevNum"]),
+        ("numbers", [sub_dev["number"] for sub_dev in payload["subDevChData"]]),
+        ("readings", legacy_readings(legacy, disabled)),
+    ]
+    actual = [
+        ("header", (compiled.version, compiled.crc, compiled.length)),
+        ("timeStamp", compiled.timestamp),
+        ("subDevNum", compiled.sub_dev_num),
+        ("numbers", [fields[index] for index in compiled.layout.sub_dev_index]),
+        ("readings", [(sensor_name, fields[index]) for sensor_name, index in compiled.layout.slots]),
+    ]
+    for (key, want), (_, got) in zip(expected, actual):
+        if want != got:
+            problems.append(f"{key}: legacy {want!r}, compiled {got!r}")
+    return problems
+
+
+def check_against_legacy(frames=50):
+    """Decode random frames both ways, with and without disabled channels."""
+    rng = random.Random(0)
+    checked = 0
+    for sub_dev_num in (0, 1, 4, 16):
+        names = [decoder.channel_name(sub_ind, ch_ind)
+                 for sub_ind in range(sub_dev_num) for ch_ind in range(decoder.SUB_DEV_CHANNELS)]
+        disabled_sets = (
+            frozenset(),
+            frozenset(names[::3]),  # scattered channels
+            frozenset(names[:decoder.SUB_DEV_CHANNELS]),  # a whole sub device
+            frozenset(names),  # everything but main
+        )
+        for disabled in disabled_sets:
+            for timestamp in range(frames):
+                frame = build_frame(sub_dev_num, timestamp, rng)
+                problems = mismatches(frame, disabled)
+                if problems:
+                    sys.exit(f"subDevNum {sub_dev_num}, {len(disabled)} disabled: " + "; ".join(problems))
+                checked += 1
+    print(f"compiled decoder matches legacy analysis_data on {checked} frames")
+
+
+def frames_per_second(decode, frame, frames):
+    start = time.perf_counter()
+    for _ in range(frames):
+        decode(frame)
+    return frames / (time.perf_counter() - start)
+
+
+def blocks_per_frame(decode, frame, frames=1000):
+    """Memory blocks still held by the decoded results, per frame."""
+    decode(frame)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    results = [decode(frame) for _ in range(frames)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    del results
+    return blocks / frames
+
+
+def main(frames=20000):
+    check_against_legacy()
+    print(f"{'subDevNum':>9} {'decoder':>8} {'frames/s':>12} {'blocks/frame':>13}")
+    for sub_dev_num in (0, 4, 16):
+        frame = build_frame(sub_dev_num)
+        for label, decode in (("legacy", legacy_analysis_data), ("compiled", decoder.decode_frame)):
+            rate = frames_per_second(decode, frame, frames)
+            blocks = blocks_per_frame(decode, frame)
+            print(f"{sub_dev_num:>9} {label:>8} {rate:>12,.0f} {blocks:>13.1f}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
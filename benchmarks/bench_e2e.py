@@ -0,0 +1,88 @@
+"""End-to-end throughput of EconestEnergy, WebSocketSensorManager and EconestSensor.
+
+Runs the simulated device and an in-process Home Assistant, performs the
+real handshake and streams frames through the manager into entities,
+then reports frames/sec, decode time, state writes/sec and reconnect time.
+
+Usage: python benchmarks/bench_e2e.py [--rate 0] [--sub-devices 4] [--duration 10]
+                                      [--drop-after N] [--malformed-every N]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import statistics
+import time
+
+from hass_harness import add_entities, async_test_hass, sensor_platform
+from simulator import DeviceSimulator
+
+from custom_components.econest.econest_intelligent import EconestEnergy
+from custom_components.econest.sensor import WebSocketSensorManager
+
+
+class TimedSensorManager(WebSocketSensorManager):
+    """Manager that accumulates the time spent in analysis_data."""
+
+    decode_time = 0.0
+    decoded = 0
+
+    def analysis_data(self, data):
+        start = time.perf_counter()
+        frame = super().analysis_data(data)
+        self.decode_time += time.perf_counter() - start
+        self.decoded += 1
+        return frame
+
+
+async def run(simulator, duration):
+    """Stream from simulator for duration seconds, return the manager."""
+    host = await simulator.start()
+    async with async_test_hass() as hass:
+        energy = EconestEnergy(hass, "econest-hems-simulator", host)
+        if not await energy.handshake(host):
+            raise RuntimeError("handshake with the simulator failed")
+        manager = TimedSensorManager(
+            hass, add_entities(sensor_platform(hass)), energy, energy.uuid, host)
+        task = asyncio.create_task(manager.start())
+        await asyncio.sleep(duration)
+        manager.stop()
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+        await energy.async_close()
+    await simulator.stop()
+    return manager
+
+
+def report(simulator, manager, duration):
+    print(f"frames/sec          {manager.frames.received / duration:12,.1f}")
+    print(f"frames dropped      {manager.frames.dropped:12,d}")
+    if manager.decoded:
+        print(f"decode us/frame     {manager.decode_time / manager.decoded * 1e6:12,.2f}")
+    print(f"state writes/sec    {manager.state_filter.state_writes / duration:12,.1f}")
+    print(f"writes suppressed   {manager.state_filter.suppressed_writes:12,d}")
+    gaps = [
+        connected - disconnected
+        for disconnected, connected in zip(simulator.disconnected_at, simulator.connected_at[1:])
+    ]
+    if gaps:
+        print(f"reconnect time      {statistics.mean(gaps):12,.2f} s  ({len(gaps)} reconnects)")
+
+
+async def main(args):
+    simulator = DeviceSimulator(args.sub_devices, args.rate, drop_after=args.drop_after,
+                                malformed_every=args.malformed_every)
+    manager = await run(simulator, args.duration)
+    report(simulator, manager, args.duration)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=0, help="frames per second, 0 for as fast as possible")
+    parser.add_argument("--sub-devices", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--drop-after", type=int)
+    parser.add_argument("--malformed-every", type=int)
+    asyncio.run(main(parser.parse_args()))
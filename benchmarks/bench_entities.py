@@ -0,0 +1,61 @@
+"""Time from the first frame to all entities being ready, by sub device count.
+
+Compares registering every new sensor with its own async_add_entities call
+(the old behaviour) against one batched call per frame.
+
+Usage: python benchmarks/bench_entities.py
+"""
+from __future__ import annotations
+
+import asyncio
+import gc
+import time
+
+from hass_harness import add_entities, async_test_hass, sensor_platform
+from simulator import build_frame
+
+from custom_components.econest.econest_intelligent import EconestEnergy
+from custom_components.econest.sensor import WebSocketSensorManager
+
+
+def one_by_one(async_add_entities):
+    """Register entities with one call each."""
+
+    def add(entities):
+        for entity in entities:
+            async_add_entities([entity])
+
+    return add
+
+
+async def first_frame_to_ready(hass, sub_dev_num, batched):
+    energy = EconestEnergy(hass, f"econest-hems-bench{sub_dev_num}{int(batched)}", "127.0.0.1")
+    platform = sensor_platform(hass)
+    add = add_entities(platform) if batched else one_by_one(add_entities(platform))
+    manager = WebSocketSensorManager(hass, add, energy, "bench", "127.0.0.1")
+    # Timed without garbage collection, like timeit, so one run does not pay for another
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        await manager.handle_message(build_frame(sub_dev_num))
+        await hass.async_block_till_done()
+        elapsed = time.perf_counter() - start
+    finally:
+        gc.enable()
+    ready = sum(1 for sensor in manager.sensors.values() if hass.states.get(sensor.entity_id))
+    await platform.async_reset()
+    return elapsed, ready
+
+
+async def main():
+    print(f"{'subDevNum':>9} {'entities':>8} {'one by one':>12} {'batched':>12}")
+    async with async_test_hass() as hass:
+        for sub_dev_num in (0, 1, 4, 16):
+            single, count = await first_frame_to_ready(hass, sub_dev_num, False)
+            batched, _ = await first_frame_to_ready(hass, sub_dev_num, True)
+            print(f"{sub_dev_num:>9} {count:>8} {single * 1e3:>9.1f} ms {batched * 1e3:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+"""Scaling of the hub from 1 to 100 simulated devices.
+
+For each device count, starts that many simulated devices, connects them
+through one EconestHub and reports the time until all streams are up,
+steady-state frames/sec, CPU use and event loop lag, and the spread of
+reconnects after every connection drops at once (a router reboot).
+
+Usage: python benchmarks/bench_hub.py [--devices 1 10 50 100] [--rate 1] [--duration 10]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from hass_harness import add_entities, async_test_hass, sensor_platform
+from simulator import DeviceSimulator
+
+from custom_components.econest.econest_intelligent import EconestEnergy
+from custom_components.econest.hub import EconestHub
+from custom_components.econest.sensor import WebSocketSensorManager
+
+
+async def wait_for(condition, timeout=600, interval=0.05):
+    start = time.monotonic()
+    while not condition():
+        if time.monotonic() - start > timeout:
+            raise TimeoutError
+        await asyncio.sleep(interval)
+    return time.monotonic() - start
+
+
+async def loop_lag(duration, interval=0.1):
+    """Largest overshoot of a periodic sleep while the streams run."""
+    worst = 0.0
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        start = time.monotonic()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.monotonic() - start - interval)
+    return worst
+
+
+async def run(count, rate, duration):
+    simulators = [DeviceSimulator(sub_dev_num=1, rate=rate, seed=ind) for ind in range(count)]
+    hosts = [await simulator.start() for simulator in simulators]
+    async with async_test_hass() as hass:
+        hub = EconestHub(hass)
+        energies = [
+            EconestEnergy(hass, f"econest-hems-sim{ind}", host, hub.session)
+            for ind, host in enumerate(hosts)
+        ]
+        await asyncio.gather(*(energy.handshake(host) for energy, host in zip(energies, hosts)))
+        managers = []
+        start = time.monotonic()
+        for ind, (energy, host) in enumerate(zip(energies, hosts)):
+            manager = WebSocketSensorManager(
+                hass, add_entities(sensor_platform(hass)), energy, energy.uuid, host, hub=hub)
+            hub.async_start_manager(f"sim{ind}", manager)
+            managers.append(manager)
+        await wait_for(lambda: all(simulator.connected_at for simulator in simulators))
+        connected = time.monotonic() - start
+
+        received = sum(manager.frames.received for manager in managers)
+        cpu, wall = time.process_time(), time.monotonic()
+        lag = await loop_lag(duration)
+        cpu, wall = time.process_time() - cpu, time.monotonic() - wall
+        frames = sum(manager.frames.received for manager in managers) - received
+
+        dropped_at = time.monotonic()
+        for simulator in simulators:
+            await simulator.drop_connections()
+        await wait_for(lambda: all(len(simulator.connected_at) >= 2 for simulator in simulators))
+        reconnects = sorted(simulator.connected_at[1] - dropped_at for simulator in simulators)
+
+        for ind in range(count):
+            await hub.async_stop_manager(f"sim{ind}")
+    for simulator in simulators:
+        await simulator.stop()
+    print(f"{count:>7} {connected:>9.2f}s {frames / wall:>10,.0f} {cpu / wall:>6.0%} "
+          f"{lag * 1e3:>8.1f}ms {reconnects[0]:>8.2f}s {reconnects[-1]:>8.2f}s")
+
+
+async def main(args):
+    print(f"{'devices':>7} {'connected':>10} {'frames/s':>10} {'cpu':>6} {'loop lag':>10} "
+          f"{'first re':>9} {'last re':>9}")
+    for count in args.devices:
+        await run(count, args.rate, args.duration)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, nargs="+", default=[1, 10, 50, 100])
+    parser.add_argument("--rate", type=float, default=1.0, help="frames per second per device")
+    parser.add_argument("--duration", type=float, default=10)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,53 @@
+"""Cost of the frame length and crc checks in decode_packet.
+
+Decodes the same simulated frames with the length and crc checks off and on
+and reports the throughput and the added time per frame. Then feeds
+truncated and corrupted frames to show they are rejected, and a frame
+without a crc to show it is accepted.
+
+Usage: python benchmarks/bench_integrity.py [frames]
+"""
+from __future__ import annotations
+
+import sys
+import time
+
+from bench_decoder import decoder
+from simulator import build_frame
+
+
+def frames_per_second(frame, frames, verify_crc):
+    decode = decoder.decode_packet
+    disabled = frozenset()
+    start = time.perf_counter()
+    for _ in range(frames):
+        decode(frame, disabled, verify_crc)
+    return frames / (time.perf_counter() - start)
+
+
+def rejected(frame):
+    try:
+        decoder.decode_packet(frame)
+    except decoder.InvalidFrame as err:
+        return str(err)
+    return "accepted"
+
+
+def main(frames=50000):
+    print(f"{'subDevNum':>9} {'bytes':>6} {'unchecked':>13} {'checked':>12} {'check cost':>10}")
+    for sub_dev_num in (0, 4, 16):
+        frame = build_frame(sub_dev_num)
+        unchecked = frames_per_second(frame, frames, False)
+        checked = frames_per_second(frame, frames, True)
+        cost = (1 / checked - 1 / unchecked) * 1e6
+        print(f"{sub_dev_num:>9} {len(frame):>6} {unchecked:>11,.0f}/s {checked:>10,.0f}/s {cost:>7.2f} us")
+    frame = build_frame(4)
+    corrupt = bytearray(frame)
+    corrupt[-1] ^= 1
+    print(f"truncated: {rejected(frame[:len(frame) // 2])}")
+    print(f"corrupted: {rejected(bytes(corrupt))}")
+    print(f"crc 0:     {rejected(frame[:4] + bytes(4) + frame[8:])}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,71 @@
+"""Time to recover from a stalled, half-open connection.
+
+The simulated device stops sending frames and reading the socket after a
+few seconds while keeping it open, so neither pings nor the close
+handshake are answered. Reports the time from the stall to
+the next established connection, with the frame-interval watchdog and
+with only aiohttp's heartbeat to notice the stall.
+
+Usage: python benchmarks/bench_recovery.py [--rates 1 10] [--cap 60]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import time
+
+from hass_harness import add_entities, async_test_hass, sensor_platform
+from simulator import DeviceSimulator
+
+from custom_components.econest.econest_intelligent import EconestEnergy
+from custom_components.econest.sensor import WebSocketSensorManager
+
+
+class HeartbeatOnlyManager(WebSocketSensorManager):
+    """Manager without the receive watchdog."""
+
+    def stall_timeout(self):
+        return None
+
+
+async def recovery_time(hass, manager_class, rate, cap):
+    simulator = DeviceSimulator(sub_dev_num=1, rate=rate, stall_after=int(rate * 3) or 1)
+    host = await simulator.start()
+    energy = EconestEnergy(hass, f"econest-hems-stall-{manager_class.__name__.lower()}-{rate}", host)
+    await energy.handshake(host)
+    manager = manager_class(hass, add_entities(sensor_platform(hass)), energy, energy.uuid, host)
+    task = asyncio.create_task(manager.start())
+    try:
+        start = time.monotonic()
+        while len(simulator.connected_at) < 2 and time.monotonic() - start < cap:
+            await asyncio.sleep(0.05)
+        if len(simulator.connected_at) < 2:
+            return None
+        return simulator.connected_at[1] - simulator.stalled_at[0]
+    finally:
+        manager.stop()
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+        await energy.async_close()
+        await simulator.stop()
+
+
+async def main(args):
+    print(f"{'rate':>6} {'watchdog':>10} {'heartbeat only':>15}")
+    async with async_test_hass() as hass:
+        for rate in args.rates:
+            results = [
+                await recovery_time(hass, manager_class, rate, args.cap)
+                for manager_class in (WebSocketSensorManager, HeartbeatOnlyManager)
+            ]
+            cells = [f"{result:.2f} s" if result is not None else f"> {args.cap} s" for result in results]
+            print(f"{rate:>4g}Hz {cells[0]:>10} {cells[1]:>15}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rates", type=float, nargs="+", default=[1, 10])
+    parser.add_argument("--cap", type=float, default=60)
+    asyncio.run(main(parser.parse_args()))
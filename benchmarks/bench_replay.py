@@ -0,0 +1,41 @@
+"""Replay a frame capture through WebSocketSensorManager.handle_message.
+
+Captures are written to <config>/econest/<device>.ecap when the
+"capture_frames" option is enabled.
+
+Usage: python benchmarks/bench_replay.py CAPTURE [--speed 1.0 | --fast]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from hass_harness import add_entities, async_test_hass, sensor_platform
+
+from custom_components.econest.capture import replay
+from custom_components.econest.econest_intelligent import EconestEnergy
+from custom_components.econest.sensor import WebSocketSensorManager
+
+
+async def main(args):
+    async with async_test_hass() as hass:
+        energy = EconestEnergy(hass, "econest-hems-replay", "127.0.0.1")
+        manager = WebSocketSensorManager(
+            hass, add_entities(sensor_platform(hass)), energy, "replay", "127.0.0.1")
+        start = time.perf_counter()
+        frames = await replay(args.capture, manager.handle_message, None if args.fast else args.speed)
+        await hass.async_block_till_done()
+        elapsed = time.perf_counter() - start
+    print(f"frames              {frames:12,d}")
+    print(f"frames/sec          {frames / elapsed:12,.1f}")
+    print(f"state writes        {manager.state_filter.state_writes:12,d}")
+    print(f"writes suppressed   {manager.state_filter.suppressed_writes:12,d}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("capture")
+    parser.add_argument("--speed", type=float, default=1.0, help="multiple of real time")
+    parser.add_argument("--fast", action="store_true", help="replay as fast as possible")
+    asyncio.run(main(parser.parse_args()))
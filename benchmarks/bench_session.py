@@ -0,0 +1,78 @@
+"""Measure setup latency and reconnect cost with per-call vs shared sessions.
+
+Runs the simulated device on 127.0.0.1 and repeats the
+register -> data-ctrl -> WebSocket handshake, first opening a new
+aiohttp.ClientSession per request (the old behaviour), then reusing a
+single keep-alive session with a DNS cache (what EconestEnergy does now).
+
+Usage: python benchmarks/bench_session.py [rounds]
+"""
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+
+import aiohttp
+
+from simulator import DeviceSimulator
+
+
+async def handshake(get_session, host):
+    """register + data-ctrl, returns the uuid."""
+    async with get_session() as session:
+        async with session.post(f"http://{host}/register", data="{}") as response:
+            uuid = (await response.json())["uuid"]
+    async with get_session() as session:
+        async with session.post(f"http://{host}/data-ctrl", data="{}") as response:
+            await response.read()
+    return uuid
+
+
+async def reconnect(get_session, host, uuid):
+    """Open the WebSocket and wait for the first frame."""
+    async with get_session() as session:
+        async with session.ws_connect(f"ws://{host}/ws/interface?uuid={uuid}") as ws:
+            await ws.receive()
+
+
+class _Borrowed:
+    """Context manager handing out a shared session without closing it."""
+
+    def __init__(self, session):
+        self._session = session
+
+    async def __aenter__(self):
+        return self._session
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+async def measure(label, get_session, host, rounds):
+    setup = reconnect_time = 0.0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        uuid = await handshake(get_session, host)
+        await reconnect(get_session, host, uuid)
+        setup += time.perf_counter() - start
+        start = time.perf_counter()
+        await reconnect(get_session, host, uuid)
+        reconnect_time += time.perf_counter() - start
+    print(f"{label:>10} setup {setup / rounds * 1e3:7.2f} ms   reconnect {reconnect_time / rounds * 1e3:7.2f} ms")
+
+
+async def main(rounds=200):
+    simulator = DeviceSimulator(sub_dev_num=0, rate=1)
+    host = await simulator.start()
+    try:
+        await measure("per-call", aiohttp.ClientSession, host, rounds)
+        connector = aiohttp.TCPConnector(ttl_dns_cache=300, keepalive_timeout=30)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            await measure("shared", lambda: _Borrowed(session), host, rounds)
+    finally:
+        await simulator.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*(int(arg) for arg in sys.argv[1:])))
@@ -0,0 +1,81 @@
+"""Measure how long an unreachable device holds up entry setup.
+
+Starts devices on 127.0.0.1 that accept TCP connections but never answer,
+then times EconestEnergy.handshake for 1..N of them in parallel, the way
+Home Assistant sets up config entries. The serial number names do not
+resolve, so only the configured host can be tried.
+
+Before the bounded timeouts every request fell back to aiohttp's default
+five minute total timeout, per candidate host, so the same run would hold
+setup for at least ten minutes; pass --legacy to time that path with a cap.
+
+Usage: python benchmarks/bench_setup.py [devices] [--legacy]
+"""
+from __future__ import annotations
+
+import asyncio
+import pathlib
+import sys
+import time
+
+import aiohttp
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from custom_components.econest.econest_intelligent import (  # noqa: E402
+    REQUEST_TIMEOUT,
+    EconestEnergy,
+)
+
+LEGACY_CAP = 30
+
+
+async def start_hung_device():
+    """A device that accepts connections and never sends a byte."""
+    connections = []
+
+    async def hang(reader, writer):
+        connections.append(writer)
+
+    server = await asyncio.start_server(hang, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    return server, f"127.0.0.1:{port}"
+
+
+async def timed_setup(host, timeout):
+    energy = EconestEnergy(None, "econest-hems-unreachable", host)
+    energy._session = aiohttp.ClientSession(timeout=timeout)
+    start = time.perf_counter()
+    try:
+        await energy.handshake(host)
+    finally:
+        await energy.async_close()
+    return time.perf_counter() - start
+
+
+async def measure(devices, timeout, label):
+    servers = [await start_hung_device() for _ in range(devices)]
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(*(timed_setup(host, timeout) for _, host in servers)), LEGACY_CAP * 2
+        )
+        elapsed = f"{time.perf_counter() - start:8.2f} s"
+    except asyncio.TimeoutError:
+        elapsed = f"> {LEGACY_CAP * 2} s (gave up)"
+    finally:
+        for server, _ in servers:
+            server.close()
+    print(f"{label:>8} {devices:>3} unreachable device(s): setup released after {elapsed}")
+
+
+async def main(devices=3, legacy=False):
+    for count in sorted({1, devices}):
+        await measure(count, REQUEST_TIMEOUT, "bounded")
+        if legacy:
+            await measure(count, aiohttp.ClientTimeout(total=5 * 60), "legacy")
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if arg != "--legacy"]
+    asyncio.run(main(*(int(arg) for arg in args), legacy="--legacy" in sys.argv))
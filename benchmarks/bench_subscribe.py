@@ -0,0 +1,83 @@
+"""Latency of a whole-frame update: dispatcher snapshot against state_changed events.
+
+Streams simulated frames through WebSocketSensorManager.handle_message and
+measures, per frame, the time until a subscriber holds every reading of it:
+once from the FrameSnapshot on the device signal, once by collecting the
+state_changed events of all the device's sensors as an automation would.
+
+Usage: python benchmarks/bench_subscribe.py [frames]
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+import statistics
+import sys
+import time
+
+from hass_harness import add_entities, async_test_hass, sensor_platform
+from simulator import build_frame
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+
+from custom_components.econest.econest_intelligent import EconestEnergy
+from custom_components.econest.sensor import WebSocketSensorManager
+
+
+async def run(hass, sub_dev_num, frames):
+    energy = EconestEnergy(hass, f"econest-hems-subscribe{sub_dev_num}", "127.0.0.1")
+    platform = sensor_platform(hass)
+    manager = WebSocketSensorManager(hass, add_entities(platform), energy, "bench", "127.0.0.1")
+    rng = random.Random(sub_dev_num)
+    await manager.handle_message(build_frame(sub_dev_num, 0, rng))
+    await hass.async_block_till_done()
+    entity_ids = {sensor.entity_id for sensor in manager.sensors.values()}
+    received = {}
+
+    @callback
+    def on_snapshot(snapshot):
+        snapshot.channels()
+        received["snapshot"] = time.perf_counter()
+
+    @callback
+    def on_state_changed(event):
+        if event.data["entity_id"] in entity_ids:
+            received["states"] += 1
+            received["last_state"] = time.perf_counter()
+
+    unsubs = (
+        async_dispatcher_connect(hass, manager.signal, on_snapshot),
+        hass.bus.async_listen(EVENT_STATE_CHANGED, on_state_changed),
+    )
+    snapshot_latency, state_latency = [], []
+    data = [build_frame(sub_dev_num, timestamp, rng) for timestamp in range(1, frames + 1)]
+    for frame in data:
+        received["states"] = 0
+        start = time.perf_counter()
+        await manager.handle_message(frame)
+        await hass.async_block_till_done()
+        snapshot_latency.append(received["snapshot"] - start)
+        if received["states"] == len(entity_ids):
+            state_latency.append(received["last_state"] - start)
+    for unsub in unsubs:
+        unsub()
+    await platform.async_reset()
+    return len(entity_ids), snapshot_latency, state_latency
+
+
+async def main(frames=200):
+    print(f"{'subDevNum':>9} {'readings':>8} {'snapshot':>11} {'state events':>13} {'complete':>9}")
+    async with async_test_hass() as hass:
+        for sub_dev_num in (0, 4, 16):
+            readings, snapshot, states = await run(hass, sub_dev_num, frames)
+            state = f"{statistics.mean(states) * 1e6:>10.0f} us" if states else f"{'-':>13}"
+            print(
+                f"{sub_dev_num:>9} {readings:>8} {statistics.mean(snapshot) * 1e6:>8.0f} us {state}"
+                f" {len(states):>4}/{frames}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*(int(arg) for arg in sys.argv[1:])))
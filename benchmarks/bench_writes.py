@@ -0,0 +1,101 @@
+"""Per state write overhead of EconestSensor against the old Entity based sensor.
+
+Streams simulated frames through WebSocketSensorManager.handle_message into
+registered entities and reports the time per state write for the legacy
+sensor (properties recomputed on every write) and the current SensorEntity
+(attributes fixed at construction).
+
+Usage: python benchmarks/bench_writes.py [--sub-devices 4] [--frames 500]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+
+from hass_harness import add_entities, async_test_hass, sensor_platform
+from simulator import build_frame
+
+from homeassistant.components.sensor import SensorDeviceClass
+from homeassistant.const import UnitOfPower
+from homeassistant.helpers.entity import Entity
+
+from custom_components.econest import sensor
+from custom_components.econest.econest_intelligent import EconestEnergy
+from custom_components.econest.sensor import WebSocketSensorManager, econest_device_info
+
+
+class LegacySensor(Entity):
+    """The sensor as it was before the move to SensorEntity."""
+
+    device_class = SensorDeviceClass.POWER
+
+    _attr_unit_of_measurement = UnitOfPower.WATT
+
+    def __init__(self, econest_energy, sensor_name):
+        self._sensor_name = sensor_name
+        self._state = None
+        self._econest_energy = econest_energy
+        self._added = False
+
+    async def async_added_to_hass(self):
+        self._added = True
+
+    @property
+    def device_info(self):
+        return econest_device_info(self._econest_energy)
+
+    @property
+    def unique_id(self):
+        return f"{self._econest_energy.serial_number_name}_{self._sensor_name}"
+
+    @property
+    def name(self):
+        return self._sensor_name
+
+    @property
+    def state(self):
+        return self._state
+
+    def update_state(self, value, attributes=None):
+        self._state = value
+        if self._added:
+            self.async_write_ha_state()
+
+
+async def run(hass, sensor_class, label, sub_dev_num, frames):
+    sensor.EconestSensor = sensor_class
+    energy = EconestEnergy(hass, f"econest-hems-{label}", "127.0.0.1")
+    platform = sensor_platform(hass)
+    manager = WebSocketSensorManager(hass, add_entities(platform), energy, label, "127.0.0.1")
+    rng = random.Random(0)
+    await manager.handle_message(build_frame(sub_dev_num, 0, rng))
+    await hass.async_block_till_done()
+    data = [build_frame(sub_dev_num, timestamp, rng) for timestamp in range(1, frames + 1)]
+    writes = manager.state_filter.state_writes
+    start = time.perf_counter()
+    for frame in data:
+        await manager.handle_message(frame)
+    elapsed = time.perf_counter() - start
+    writes = manager.state_filter.state_writes - writes
+    await platform.async_reset()
+    return elapsed / writes, writes
+
+
+async def main(args):
+    original = sensor.EconestSensor
+    async with async_test_hass() as hass:
+        legacy, writes = await run(hass, LegacySensor, "legacy", args.sub_devices, args.frames)
+        current, _ = await run(hass, original, "current", args.sub_devices, args.frames)
+    sensor.EconestSensor = original
+    print(f"state writes        {writes:12,d}")
+    print(f"legacy              {legacy * 1e6:9.1f} us/write")
+    print(f"SensorEntity        {current * 1e6:9.1f} us/write")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sub-devices", type=int, default=4)
+    parser.add_argument("--frames", type=int, default=500)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,60 @@
+"""Minimal in-process Home Assistant for the benchmarks.
+
+Loads only the registries needed to add entities with unique ids through a
+real EntityPlatform, so entity registration and state writes go through
+the same code paths as in production.
+"""
+from __future__ import annotations
+
+import contextlib
+import logging
+import pathlib
+import sys
+import tempfile
+from datetime import timedelta
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from homeassistant.config_entries import ConfigEntries  # noqa: E402
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.helpers import (  # noqa: E402
+    area_registry as ar,
+    device_registry as dr,
+    entity_registry as er,
+    floor_registry as fr,
+    label_registry as lr,
+)
+from homeassistant.helpers.entity_platform import EntityPlatform  # noqa: E402
+
+
+@contextlib.asynccontextmanager
+async def async_test_hass():
+    """Yield a running HomeAssistant instance backed by a temporary config dir."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        hass.config_entries = ConfigEntries(hass, {})
+        for registry in (ar, fr, lr, dr, er):
+            await registry.async_load(hass)
+        await hass.async_start()
+        try:
+            yield hass
+        finally:
+            await hass.async_stop(force=True)
+
+
+def sensor_platform(hass) -> EntityPlatform:
+    """Return an econest sensor platform to add entities to."""
+    return EntityPlatform(
+        hass=hass,
+        logger=logging.getLogger("econest.bench"),
+        domain="sensor",
+        platform_name="econest",
+        platform=None,
+        scan_interval=timedelta(seconds=30),
+        entity_namespace=None,
+    )
+
+
+def add_entities(platform: EntityPlatform):
+    """Return the AddEntitiesCallback Home Assistant hands to async_setup_entry."""
+    return platform._async_schedule_add_entities
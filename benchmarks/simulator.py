@@ -0,0 +1,221 @@
+"""Local stand-in for an Econest device.
+
+Serves /system-info, /register, /sync and /data-ctrl and streams type 2
+sample frames over /ws/interface. /sync streams one recorded frame every
+history_interval seconds of the requested window. A uuid with
+logdataEnable set also gets a type 3 log record after every sample frame.
+Optional faults:
+
+* response_delay: seconds to wait before answering each HTTP request
+* drop_after: close each WebSocket after this many frames
+* malformed_every: send a truncated frame every N frames
+* corrupt_every: flip a payload bit every N frames, keeping the crc
+* stall_after: after this many frames stop sending and stop reading, so
+  pings and the close handshake go unanswered, while keeping the
+  connection open like a half-open socket
+
+Usage: python benchmarks/simulator.py [--port 8080] [--rate 10] [--sub-devices 4]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import itertools
+import random
+import struct
+import time
+import zlib
+
+from aiohttp import WSMsgType, web
+
+SAMPLE_DATA_TYPE = 2
+LOG_DATA_TYPE = 3
+SUB_DEV_CHANNELS = 10
+
+
+def build_frame(sub_dev_num, timestamp=0, rng=random, packet_type=SAMPLE_DATA_TYPE):
+    """Build a sample data frame, or a log record with packet_type 3."""
+    payload = struct.pack("<IB", timestamp, sub_dev_num)
+    payload += struct.pack("<iI", rng.randint(-5000, 5000), rng.randint(0, 10**6))
+    for number in range(sub_dev_num):
+        payload += struct.pack("<B", number)
+        for _ in range(SUB_DEV_CHANNELS):
+            payload += struct.pack("<iI", rng.randint(-5000, 5000), rng.randint(0, 10**6))
+    return struct.pack("<IIII", 1, zlib.crc32(payload), packet_type, len(payload)) + payload
+
+
+class DeviceSimulator:
+    """An in-process Econest device."""
+
+    def __init__(self, sub_dev_num=4, rate=10.0, response_delay=0.0,
+                 drop_after=None, malformed_every=None, stall_after=None, seed=0,
+                 history_interval=10, corrupt_every=None):
+        self.sub_dev_num = sub_dev_num
+        self.rate = rate
+        self.response_delay = response_delay
+        self.drop_after = drop_after
+        self.malformed_every = malformed_every
+        self.stall_after = stall_after
+        self.history_interval = history_interval
+        self.corrupt_every = corrupt_every
+        self.stalled_at = []
+        self.rng = random.Random(seed)
+        self.uuids = set()
+        self.log_uuids = set()
+        self._uuid_counter = itertools.count(1)
+        self.frames_sent = 0
+        self.connected_at = []
+        self.disconnected_at = []
+        self.host = None
+        self._runner = None
+        self._sockets = set()
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/system-info", self._system_info)
+        app.router.add_post("/register", self._register)
+        app.router.add_post("/sync", self._sync)
+        app.router.add_post("/data-ctrl", self._data_ctrl)
+        app.router.add_get("/ws/interface", self._ws_interface)
+        return app
+
+    async def start(self, host="127.0.0.1", port=0) -> str:
+        """Start serving, returns host:port."""
+        self._runner = web.AppRunner(self.build_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        self.host = f"{host}:{site._server.sockets[0].getsockname()[1]}"
+        return self.host
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def drop_connections(self) -> None:
+        """Close every open WebSocket, like a router reboot would."""
+        for ws in list(self._sockets):
+            await ws.close()
+
+    async def _delay(self):
+        if self.response_delay:
+            await asyncio.sleep(self.response_delay)
+
+    async def _system_info(self, request):
+        await self._delay()
+        return web.json_response({"subDevNum": self.sub_dev_num})
+
+    async def _register(self, request):
+        await self._delay()
+        uuid = f"sim-{next(self._uuid_counter)}"
+        self.uuids.add(uuid)
+        return web.json_response({"uuid": uuid})
+
+    async def _sync(self, request):
+        await self._delay()
+        body = await request.json()
+        start, end = body.get("timestampFrom", 0), body.get("timestampTo", 0)
+        response = web.StreamResponse()
+        await response.prepare(request)
+        for timestamp in range(start, end, self.history_interval):
+            await response.write(build_frame(self.sub_dev_num, timestamp, self.rng))
+        await response.write_eof()
+        return response
+
+    async def _data_ctrl(self, request):
+        await self._delay()
+        body = await request.json()
+        if body.get("logdataEnable"):
+            self.log_uuids.add(body.get("uuid"))
+        else:
+            self.log_uuids.discard(body.get("uuid"))
+        return web.json_response({})
+
+    def next_frame(self) -> bytes:
+        frame = build_frame(self.sub_dev_num, int(time.time()), self.rng)
+        self.frames_sent += 1
+        if self.malformed_every and self.frames_sent % self.malformed_every == 0:
+            return frame[: len(frame) // 2]
+        if self.corrupt_every and self.frames_sent % self.corrupt_every == 0:
+            corrupt = bytearray(frame)
+            corrupt[-1] ^= 1
+            return bytes(corrupt)
+        return frame
+
+    async def _ws_interface(self, request):
+        if request.query.get("uuid") not in self.uuids:
+            raise web.HTTPForbidden()
+        ws = web.WebSocketResponse(autoping=False)
+        await ws.prepare(request)
+        self.connected_at.append(time.monotonic())
+        self._sockets.add(ws)
+        reader = asyncio.create_task(self._read(ws))
+        stream = asyncio.create_task(self._stream(ws, request.query["uuid"], reader))
+        try:
+            with contextlib.suppress(asyncio.CancelledError):
+                await reader
+            # A stalled socket no longer reads, it is only gone once the client drops it
+            while request.transport is not None and not request.transport.is_closing():
+                await asyncio.sleep(0.05)
+        finally:
+            reader.cancel()
+            stream.cancel()
+            self._sockets.discard(ws)
+            self.disconnected_at.append(time.monotonic())
+        return ws
+
+    async def _read(self, ws):
+        # Reading answers pings and the client's close handshake
+        async for msg in ws:
+            if msg.type == WSMsgType.PING:
+                await ws.pong(msg.data)
+
+    async def _stream(self, ws, uuid, reader):
+        interval = 1 / self.rate if self.rate else 0
+        try:
+            for sent in itertools.count(1):
+                await ws.send_bytes(self.next_frame())
+                if uuid in self.log_uuids:
+                    await ws.send_bytes(build_frame(
+                        self.sub_dev_num, int(time.time()), self.rng, LOG_DATA_TYPE))
+                if self.drop_after and sent >= self.drop_after:
+                    break
+                if self.stall_after and sent >= self.stall_after:
+                    self.stalled_at.append(time.monotonic())
+                    reader.cancel()
+                    return
+                await asyncio.sleep(interval)
+        except ConnectionError:
+            pass
+        await ws.close()
+
+
+async def _serve(args):
+    simulator = DeviceSimulator(args.sub_devices, args.rate, args.response_delay,
+                                args.drop_after, args.malformed_every, args.stall_after,
+                                corrupt_every=args.corrupt_every)
+    host = await simulator.start(args.bind, args.port)
+    print(f"Simulated device listening on {host}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await simulator.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bind", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--rate", type=float, default=10.0, help="frames per second")
+    parser.add_argument("--sub-devices", type=int, default=4)
+    parser.add_argument("--response-delay", type=float, default=0.0)
+    parser.add_argument("--drop-after", type=int)
+    parser.add_argument("--malformed-every", type=int)
+    parser.add_argument("--stall-after", type=int)
+    parser.add_argument("--corrupt-every", type=int)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
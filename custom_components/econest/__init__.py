@@ -3,24 +3,72 @@ from __future__ import annotations
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.const import Platform
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.typing import ConfigType
 
-from . import econest_intelligent
-from .const import DOMAIN
+from . import econest_intelligent, websocket_api
+from .const import CONF_LOG_DATA, DATA_HUB, DOMAIN
+from .hub import async_get_hub
 
 PLATFORMS = [Platform.SENSOR]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
 type EconestConfigEntry = ConfigEntry[econest_intelligent.EconestEnergy]
 
 
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    websocket_api.async_setup(hass)
+    return True
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: EconestConfigEntry) -> bool:
-    entry.runtime_data = econest_intelligent.EconestEnergy(hass, entry.data["serial_number"], entry.data["host"])
+    if entry.unique_id is None:
+        # Entries added by hand before they had a unique id, needed for the discovery lookup
+        unique_id = econest_intelligent.serial_number_name(entry.data["serial_number"])
+        if not hass.config_entries.async_entry_for_domain_unique_id(DOMAIN, unique_id):
+            hass.config_entries.async_update_entry(entry, unique_id=unique_id)
+    hub = async_get_hub(hass)
+    econest_energy = econest_intelligent.EconestEnergy(
+        hass, entry.data["serial_number"], entry.data["host"], hub.session)
+    econest_energy.log_data = entry.options.get(CONF_LOG_DATA, False)
+    await econest_energy.async_load_cache()
+    if econest_energy.uuid is None:
+        if not await econest_energy.handshake(entry.data["host"]):
+            await econest_energy.async_close()
+            raise ConfigEntryNotReady(f"Unable to start the data stream of {econest_energy.serial_number_name}")
+    elif econest_energy.log_data_enabled != econest_energy.log_data:
+        # Best effort, the next handshake sends the setting again
+        await econest_energy.data_ctrl(econest_energy.uuid, entry.data["host"])
+    entry.runtime_data = econest_energy
+    options = dict(entry.options)
+
+    async def async_entry_updated(hass: HomeAssistant, entry: EconestConfigEntry) -> None:
+        """Reload the entry when its options change, move a running stream to a new host."""
+        if entry.options != options:
+            await hass.config_entries.async_reload(entry.entry_id)
+            return
+        host = entry.data["host"]
+        econest_energy.set_host(host)
+        if sensor_manager := hass.data.get(DOMAIN, {}).get(entry.entry_id):
+            sensor_manager.set_host(host)
+
+    entry.async_on_unload(entry.add_update_listener(async_entry_updated))
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     return True
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the session cache of a deleted entry."""
+    await econest_intelligent.async_remove_cache(hass, entry.data["serial_number"])
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    sensor_manager = hass.data[DOMAIN].pop(entry.entry_id, None)
-    if sensor_manager:
-        sensor_manager.stop()
+    hass.data.get(DOMAIN, {}).pop(entry.entry_id, None)
+    if hub := hass.data.get(DATA_HUB):
+        await hub.async_stop_manager(entry.entry_id)
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if unload_ok:
+        await entry.runtime_data.async_close()
     return unload_ok
@@ -0,0 +1,203 @@
+"""Rolling aggregation of channel power over fixed time windows."""
+from __future__ import annotations
+
+import time
+from array import array
+from datetime import timedelta
+from math import inf
+from operator import add, sub
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.util import dt as dt_util
+
+# Window length in seconds and the attribute suffix of its aggregates
+AGGREGATE_WINDOWS = ((60, "1m"), (900, "15m"))
+WINDOW_BUCKETS = 60
+PUBLISH_INTERVAL = 60
+
+
+class WindowAggregator:
+    """Rolling count, sum, min and max of many channels over one window.
+
+    The window is a ring of WINDOW_BUCKETS time buckets whose sum, min and
+    max of every channel live in preallocated buckets x channels arrays.
+    A sample is only appended to the open bucket, which is reduced and
+    stored in the ring once time moves past it, updating the running window
+    sums as expired buckets drop out. min and max are folded over the
+    buckets when the aggregates are read.
+    """
+
+    def __init__(self, window: int, channels: int, buckets: int = WINDOW_BUCKETS) -> None:
+        self.window = window
+        self.channels = channels
+        self.buckets = buckets
+        self._span = window / buckets
+        size = buckets * channels
+        self._count = array("I", bytes(4 * buckets))
+        self._sum = array("d", bytes(8 * size))
+        self._min = array("d", bytes(8 * size))
+        self._max = array("d", bytes(8 * size))
+        # Totals of the stored buckets
+        self._window_sum = [0.0] * channels
+        self._window_count = 0
+        # Samples of the open bucket
+        self._current = None
+        self._open = []
+
+    def _store(self) -> None:
+        """Reduce the open bucket into the ring."""
+        if not self._open:
+            return
+        columns = list(zip(*self._open))
+        sums = list(map(sum, columns))
+        pos = self._current % self.buckets
+        base = pos * self.channels
+        end = base + self.channels
+        self._sum[base:end] = array("d", sums)
+        self._min[base:end] = array("d", map(min, columns))
+        self._max[base:end] = array("d", map(max, columns))
+        self._count[pos] = len(self._open)
+        self._window_sum = list(map(add, self._window_sum, sums))
+        self._window_count += len(self._open)
+        self._open = []
+
+    def _expire(self, pos: int) -> None:
+        """Drop a stored bucket from the window."""
+        if not self._count[pos]:
+            return
+        base = pos * self.channels
+        self._window_sum = list(map(sub, self._window_sum, self._sum[base:base + self.channels]))
+        self._window_count -= self._count[pos]
+        self._count[pos] = 0
+
+    def _advance(self, bucket: int) -> None:
+        current = self._current
+        if current is None or bucket < current or bucket - current >= self.buckets:
+            # First sample, clock jump back or a gap longer than the window
+            self._open = []
+            for pos in range(self.buckets):
+                self._count[pos] = 0
+            self._window_sum = [0.0] * self.channels
+            self._window_count = 0
+        else:
+            self._store()
+            for expired in range(current + 1, bucket + 1):
+                self._expire(expired % self.buckets)
+        self._current = bucket
+
+    def add(self, timestamp: int, values) -> None:
+        """Add one sample of every channel."""
+        bucket = int(timestamp // self._span)
+        if bucket != self._current:
+            self._advance(bucket)
+        self._open.append(values)
+
+    def aggregates(self) -> list[tuple[float, float, float]] | None:
+        """Return (min, max, mean) of every channel, None for an empty window."""
+        count = self._window_count + len(self._open)
+        if not count:
+            return None
+        channels = self.channels
+        if self._open:
+            columns = list(zip(*self._open))
+            low, high = list(map(min, columns)), list(map(max, columns))
+            total = list(map(add, self._window_sum, map(sum, columns)))
+        else:
+            low, high = [inf] * channels, [-inf] * channels
+            total = self._window_sum
+        for pos in range(self.buckets):
+            if self._count[pos]:
+                base = pos * channels
+                low = list(map(min, low, self._min[base:base + channels]))
+                high = list(map(max, high, self._max[base:base + channels]))
+        return [(low[ch], high[ch], total[ch] / count) for ch in range(channels)]
+
+
+class PowerAggregation:
+    """Aggregation stage of a device that replaces per-sample power state writes.
+
+    Every power reading is fed into the AGGREGATE_WINDOWS and each power
+    sensor is written once per PUBLISH_INTERVAL: the mean of the shortest
+    window as state and min, max, mean and the day's peak mean of every
+    window as attributes. Windows only move with device timestamps, so one
+    that has seen no sample for its length of wall-clock time is stale and
+    not published, and nothing is written once the shortest one is.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._hass = hass
+        self._sensors = ()
+        self._indices = ()
+        self._windows = ()
+        self._peaks = {}
+        self._peak_day = None
+        self._unsub = None
+        self._last_sample = None
+        self.state_writes = 0
+
+    def set_routes(self, routes) -> None:
+        """Aggregate the (sensor, field index) routes of the current frame layout."""
+        self._sensors = tuple(sensor for sensor, _ in routes)
+        self._indices = tuple(index for _, index in routes)
+        self._windows = tuple(
+            (WindowAggregator(window, len(routes)), label) for window, label in AGGREGATE_WINDOWS
+        )
+        self._peaks = {label: [-inf] * len(routes) for _, label in AGGREGATE_WINDOWS}
+
+    def add(self, timestamp: int, fields) -> None:
+        """Feed the power readings of a decoded frame into every window."""
+        values = [fields[index] for index in self._indices]
+        for aggregator, _ in self._windows:
+            aggregator.add(timestamp, values)
+        self._last_sample = time.monotonic()
+
+    @callback
+    def async_start(self) -> None:
+        """Start the publish timer."""
+        if self._unsub is None:
+            self._unsub = async_track_time_interval(
+                self._hass, self._async_publish, timedelta(seconds=PUBLISH_INTERVAL),
+                name="econest aggregation",
+            )
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop the publish timer."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    @callback
+    def _async_publish(self, now=None) -> None:
+        """Write the window aggregates to every power sensor."""
+        day = dt_util.now().date()
+        if day != self._peak_day:
+            self._peak_day = day
+            for peaks in self._peaks.values():
+                peaks[:] = [-inf] * len(peaks)
+        if self._last_sample is None:
+            return
+        idle = time.monotonic() - self._last_sample
+        attributes = [{} for _ in self._sensors]
+        for ind, (aggregator, label) in enumerate(self._windows):
+            aggregates = None if idle >= aggregator.window else aggregator.aggregates()
+            if aggregates is None:
+                if ind == 0:
+                    return
+                continue
+            peaks = self._peaks[label]
+            for ch, (low, high, mean) in enumerate(aggregates):
+                if mean > peaks[ch]:
+                    peaks[ch] = mean
+                attributes[ch].update({
+                    f"min_{label}": low,
+                    f"max_{label}": high,
+                    f"mean_{label}": round(mean, 1),
+                    f"peak_{label}": round(peaks[ch], 1),
+                })
+            if ind == 0:
+                states = [round(mean, 1) for _, _, mean in aggregates]
+        for sensor, state, sensor_attributes in zip(self._sensors, states, attributes):
+            sensor.update_state(state, sensor_attributes)
+            self.state_writes += 1
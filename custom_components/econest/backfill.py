@@ -0,0 +1,193 @@
+"""Backfill of missed history through the /sync endpoint into long-term statistics."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import struct
+from collections import Counter
+from datetime import datetime, timezone
+
+import numpy as np
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.const import UnitOfEnergy, UnitOfPower
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import slugify
+
+from .const import DOMAIN
+from .batch import BATCH_TYPES, decode_batches, fits_layout
+from .decoder import HEAD_FORMAT, MAX_PAYLOAD_SIZE, InvalidFrame, check_frame
+
+_LOGGER = logging.getLogger(__name__)
+
+# Window requested per /sync call, one statistics period
+BACKFILL_CHUNK = 3600
+# Gaps shorter than this are not worth a backfill
+BACKFILL_MIN_GAP = 300
+
+_HEAD = struct.Struct(HEAD_FORMAT)
+
+
+async def read_frames(content, verify_crc=True, counts=None):
+    """Read raw frames from a /sync response stream, dropping any that fail their checks.
+
+    Frames failing the length or crc check are counted in counts["invalid"].
+    """
+    while True:
+        try:
+            head = await content.readexactly(_HEAD.size)
+        except asyncio.IncompleteReadError:
+            return
+        length = _HEAD.unpack(head)[3]
+        if length > MAX_PAYLOAD_SIZE:
+            # A corrupt header, the frame boundaries of the rest of the stream are lost
+            _LOGGER.warning("Sync stream dropped at a frame of %s bytes", length)
+            return
+        try:
+            payload = await content.readexactly(length)
+        except asyncio.IncompleteReadError:
+            _LOGGER.debug("Sync stream ended inside a frame")
+            return
+        frame = head + payload
+        try:
+            packet_type = check_frame(memoryview(frame), verify_crc)[2]
+        except InvalidFrame as err:
+            _LOGGER.debug("Dropped invalid sync frame: %s", err)
+            if counts is not None:
+                counts["invalid"] += 1
+            continue
+        if packet_type not in BATCH_TYPES:
+            continue
+        if not fits_layout(frame):
+            _LOGGER.debug("Dropped sync frame with a length that does not match its subDevNum")
+            continue
+        yield frame
+
+
+class HourlyAggregator:
+    """Reduce decoded batches to hourly mean/min/max power and last energy."""
+
+    def __init__(self) -> None:
+        self.power = {}
+        self.energy = {}
+
+    def add(self, batch) -> None:
+        hours = batch.timestamps - batch.timestamps % 3600
+        for hour in np.unique(hours).tolist():
+            rows = hours == hour
+            power = batch.power[rows]
+            lows = power.min(axis=0).tolist()
+            highs = power.max(axis=0).tolist()
+            totals = power.sum(axis=0, dtype=np.int64).tolist()
+            count = len(power)
+            last_energy = batch.energy[rows][-1].tolist()
+            for ind, channel in enumerate(batch.channels):
+                self.energy[(f"{channel}-Energy", hour)] = last_energy[ind]
+                key = (f"{channel}-Power", hour)
+                stats = self.power.get(key)
+                if stats is None:
+                    self.power[key] = [lows[ind], highs[ind], totals[ind], count]
+                else:
+                    stats[0] = min(stats[0], lows[ind])
+                    stats[1] = max(stats[1], highs[ind])
+                    stats[2] += totals[ind]
+                    stats[3] += count
+
+    def statistics(self):
+        """Return {sensor name: [StatisticData]} of everything aggregated."""
+        result = {}
+        for (sensor_name, hour), (low, high, total, count) in sorted(self.power.items()):
+            result.setdefault(sensor_name, []).append(
+                StatisticData(start=_utc(hour), mean=total / count, min=low, max=high)
+            )
+        for (sensor_name, hour), value in sorted(self.energy.items()):
+            result.setdefault(sensor_name, []).append(
+                StatisticData(start=_utc(hour), state=value, sum=value)
+            )
+        return result
+
+
+def _utc(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc)
+
+
+class Backfill:
+    """Catch up missed history chunk by chunk without blocking live data.
+
+    The pending window lives in the EconestEnergy session cache, so a long
+    outage is resumed after a restart.
+    """
+
+    def __init__(self, hass: HomeAssistant, econest_energy, host, disabled_channels=frozenset(),
+                 verify_crc=True) -> None:
+        self._hass = hass
+        self._econest_energy = econest_energy
+        self.host = host
+        self._disabled_channels = disabled_channels
+        self._verify_crc = verify_crc
+        self._task = None
+
+    @callback
+    def async_schedule(self, timestamp) -> None:
+        """Note the first live timestamp after a connect and start a backfill if there is a gap."""
+        econest_energy = self._econest_energy
+        last = econest_energy.last_timestamp
+        if last is not None and timestamp - last >= BACKFILL_MIN_GAP:
+            window = econest_energy.backfill_window
+            start = window[0] if window else last
+            econest_energy.backfill_window = [start, timestamp]
+            econest_energy.async_save_cache()
+        if econest_energy.backfill_window and (self._task is None or self._task.done()):
+            self._task = self._hass.async_create_background_task(
+                self._async_run(), f"econest backfill {econest_energy.serial_number_name}"
+            )
+
+    @callback
+    def async_cancel(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _async_run(self):
+        econest_energy = self._econest_energy
+        while econest_energy.backfill_window:
+            start, end = econest_energy.backfill_window
+            chunk_end = min(end, start - start % BACKFILL_CHUNK + BACKFILL_CHUNK)
+            aggregator = HourlyAggregator()
+            counts = Counter()
+
+            async def handle(response):
+                frames = [frame async for frame in read_frames(response.content, self._verify_crc, counts)]
+                counts["valid"] = len(frames)
+                for batch in decode_batches(frames, self._disabled_channels, verify_crc=False):
+                    aggregator.add(batch)
+                return True
+
+            if not await econest_energy.sync_data(
+                econest_energy.uuid, self.host, start, chunk_end, handle
+            ):
+                _LOGGER.warning("Backfill of %s stopped at %s", econest_energy.serial_number_name, start)
+                return
+            if counts["invalid"] and not counts["valid"]:
+                # Keep the window, this looks like firmware with another length or crc convention
+                _LOGGER.warning(
+                    "Backfill of %s stopped at %s, all %s sync frames failed the length or crc check. "
+                    "Turn off the verify_crc option if the firmware uses another convention",
+                    econest_energy.serial_number_name, start, counts["invalid"])
+                return
+            self._import(aggregator.statistics())
+            econest_energy.backfill_window = [chunk_end, end] if chunk_end < end else None
+            econest_energy.async_save_cache()
+
+    def _import(self, statistics):
+        serial_number_name = self._econest_energy.serial_number_name
+        for sensor_name, data in statistics.items():
+            is_energy = sensor_name.endswith("-Energy")
+            metadata = StatisticMetaData(
+                has_mean=not is_energy,
+                has_sum=is_energy,
+                name=f"{serial_number_name} {sensor_name}",
+                source=DOMAIN,
+                statistic_id=f"{DOMAIN}:{slugify(f'{serial_number_name}_{sensor_name}')}",
+                unit_of_measurement=UnitOfEnergy.WATT_HOUR if is_energy else UnitOfPower.WATT,
+            )
+            async_add_external_statistics(self._hass, metadata, data)
@@ -0,0 +1,139 @@
+"""Columnar decoding of many sample frames at once with NumPy.
+
+For replay, backfill and capture analysis, where thousands of frames with
+the same layout are decoded together. A batch is viewed through one
+structured dtype and comes out as timestamps plus frames x channels power
+and energy arrays, without a Python object per frame or reading.
+"""
+from __future__ import annotations
+
+import struct
+from functools import lru_cache
+from zlib import crc32
+
+import numpy as np
+
+from .decoder import (
+    CH_DATA_KEYS,
+    HEAD_FORMAT,
+    LOG_DATA_TYPE,
+    SAMPLE_DATA_TYPE,
+    SUB_DEV_CHANNELS,
+    SYNC_DATA_TYPE,
+    InvalidFrame,
+    channel_name,
+)
+
+# Packet types that carry sample data and can be decoded together
+BATCH_TYPES = (SAMPLE_DATA_TYPE, LOG_DATA_TYPE, SYNC_DATA_TYPE)
+
+_HEAD_SIZE = struct.calcsize(HEAD_FORMAT)
+_SUB_DEV_NUM_OFFSET = _HEAD_SIZE + 4
+
+_CH_DATA = np.dtype([(CH_DATA_KEYS[0], "<i4"), (CH_DATA_KEYS[1], "<u4")])
+
+
+@lru_cache(maxsize=None)
+def frame_dtype(sub_dev_num: int) -> np.dtype:
+    """Return the packed structured dtype of a frame with subDevNum sub devices."""
+    fields = [
+        ("version", "<u4"),
+        ("crc", "<u4"),
+        ("type", "<u4"),
+        ("length", "<u4"),
+        ("timestamp", "<u4"),
+        ("sub_dev_num", "u1"),
+        ("main", _CH_DATA),
+    ]
+    if sub_dev_num:
+        sub_dev = np.dtype([("number", "u1"), ("channels", _CH_DATA, (SUB_DEV_CHANNELS,))])
+        fields.append(("sub_devs", sub_dev, (sub_dev_num,)))
+    return np.dtype(fields)
+
+
+def fits_layout(frame) -> bool:
+    """Return True if a frame is exactly as long as its subDevNum says."""
+    return len(frame) > _SUB_DEV_NUM_OFFSET and len(frame) == frame_dtype(frame[_SUB_DEV_NUM_OFFSET]).itemsize
+
+
+def channel_names(sub_dev_num: int) -> tuple[str, ...]:
+    """Return the channel names in column order, the prefix of their sensor names."""
+    return ("ecoMain",) + tuple(
+        channel_name(sub_ind, ch_ind)
+        for sub_ind in range(sub_dev_num)
+        for ch_ind in range(SUB_DEV_CHANNELS)
+    )
+
+
+class FrameBatch:
+    """Decoded frames of one layout as columns."""
+
+    __slots__ = ("sub_dev_num", "channels", "timestamps", "power", "energy")
+
+    def __init__(self, sub_dev_num, channels, timestamps, power, energy) -> None:
+        self.sub_dev_num = sub_dev_num
+        self.channels = channels
+        self.timestamps = timestamps
+        self.power = power
+        self.energy = energy
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+
+def decode_batch(frames, disabled: frozenset[str] = frozenset(), verify_crc: bool = True) -> FrameBatch:
+    """Decode a concatenated buffer or a list of frames that share one subDevNum.
+
+    Channels named in disabled are left out of the power and energy columns.
+    Raises InvalidFrame if any frame has another layout or type, or with
+    verify_crc a wrong length or non-zero crc.
+    """
+    buffer = frames if isinstance(frames, (bytes, bytearray, memoryview)) else b"".join(frames)
+    view = memoryview(buffer)
+    if len(view) <= _SUB_DEV_NUM_OFFSET:
+        raise InvalidFrame("batch ends before the first subDevNum")
+    sub_dev_num = view[_SUB_DEV_NUM_OFFSET]
+    dtype = frame_dtype(sub_dev_num)
+    size = dtype.itemsize
+    if len(view) % size:
+        raise InvalidFrame(f"{len(view)} bytes is not a whole number of {size} byte frames")
+    records = np.frombuffer(view, dtype)
+    if not (records["sub_dev_num"] == sub_dev_num).all():
+        raise InvalidFrame("frames with different subDevNum in one batch")
+    if not np.isin(records["type"], BATCH_TYPES).all():
+        raise InvalidFrame("batch contains packets that are not sample data")
+    if verify_crc:
+        if not (records["length"] == size - _HEAD_SIZE).all():
+            raise InvalidFrame("frame length does not match the layout")
+        for offset, crc in zip(range(0, len(view), size), records["crc"].tolist()):
+            # A crc of 0 was not filled in by the device
+            if crc and crc32(view[offset + _HEAD_SIZE:offset + size]) != crc:
+                raise InvalidFrame(f"crc mismatch in frame {offset // size}")
+
+    count = len(records)
+    main = records["main"]
+    power = np.empty((count, 1 + SUB_DEV_CHANNELS * sub_dev_num), np.int32)
+    energy = np.empty(power.shape, np.uint32)
+    power[:, 0] = main[CH_DATA_KEYS[0]]
+    energy[:, 0] = main[CH_DATA_KEYS[1]]
+    if sub_dev_num:
+        channels = records["sub_devs"]["channels"]
+        power[:, 1:] = channels[CH_DATA_KEYS[0]].reshape(count, -1)
+        energy[:, 1:] = channels[CH_DATA_KEYS[1]].reshape(count, -1)
+
+    names = channel_names(sub_dev_num)
+    if disabled:
+        keep = [ind for ind, name in enumerate(names) if name not in disabled]
+        names = tuple(names[ind] for ind in keep)
+        power = power[:, keep]
+        energy = energy[:, keep]
+    return FrameBatch(sub_dev_num, names, records["timestamp"].copy(), power, energy)
+
+
+def decode_batches(frames, disabled: frozenset[str] = frozenset(), verify_crc: bool = True):
+    """Decode a list of frames into one FrameBatch per run of frames with the same subDevNum."""
+    start = 0
+    for ind in range(1, len(frames) + 1):
+        if ind == len(frames) or frames[ind][_SUB_DEV_NUM_OFFSET] != frames[start][_SUB_DEV_NUM_OFFSET]:
+            yield decode_batch(frames[start:ind], disabled, verify_crc)
+            start = ind
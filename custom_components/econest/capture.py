@@ -0,0 +1,174 @@
+"""Recording and replay of raw WebSocket frames.
+
+A capture file is the MAGIC header followed by records of a RECORD_HEAD
+(receive time as a POSIX timestamp, frame length) and the raw frame bytes.
+Files are only ever appended to, so a capture survives restarts and crashes
+up to the last flush. Recording stops with a warning once a file reaches
+MAX_CAPTURE_SIZE or a write fails.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import mmap
+import os
+import struct
+import time
+
+MAGIC = b"ECNCAP1\n"
+RECORD_HEAD = struct.Struct("<dI")  # receive time, length
+FLUSH_SIZE = 64 * 1024
+FLUSH_INTERVAL = 5
+# About half a day at 10 Hz with 16 sub devices
+MAX_CAPTURE_SIZE = 512 * 1024 * 1024
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CaptureWriter:
+    """Buffer received frames and append them to a capture file in the executor."""
+
+    def __init__(self, hass, path: str) -> None:
+        self._hass = hass
+        self.path = path
+        self._buffer = bytearray()
+        self._last_flush = time.monotonic()
+        self._writing = None
+        self.frames = 0
+        self.stopped = False
+
+    def record(self, frame, received=None) -> None:
+        """Add a frame to the capture."""
+        if self.stopped:
+            return
+        if received is None:
+            received = time.time()
+        self._buffer += RECORD_HEAD.pack(received, len(frame))
+        self._buffer += frame
+        self.frames += 1
+        now = time.monotonic()
+        if self._writing is not None:
+            if not self._writing.done():
+                return  # keep buffering so appends stay in order
+            self._check_written()
+            if self.stopped:
+                return
+        if len(self._buffer) >= FLUSH_SIZE or now - self._last_flush >= FLUSH_INTERVAL:
+            self._last_flush = now
+            self._writing = self._hass.async_add_executor_job(self._write, self._take())
+
+    def _take(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+    def _write(self, data: bytes) -> int:
+        """Append data unless the file is full, returns the file size."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "ab") as file:
+            if file.tell() >= MAX_CAPTURE_SIZE:
+                return file.tell()
+            if file.tell() == 0:
+                file.write(MAGIC)
+            file.write(data)
+            return file.tell()
+
+    def _check_written(self) -> None:
+        """Stop recording after a failed write or once the file is full."""
+        writing, self._writing = self._writing, None
+        if writing.exception() is not None:
+            _LOGGER.warning("Frame capture to %s stopped, write failed: %s", self.path, writing.exception())
+        elif writing.result() >= MAX_CAPTURE_SIZE:
+            _LOGGER.warning(
+                "Frame capture %s reached %s MiB, recording stopped", self.path, MAX_CAPTURE_SIZE >> 20)
+        else:
+            return
+        self.stopped = True
+        self._buffer.clear()
+
+    async def async_close(self) -> None:
+        """Write out everything still buffered."""
+        if self._writing is not None:
+            await asyncio.wait([self._writing])
+            self._check_written()
+        if self._buffer:
+            self._writing = self._hass.async_add_executor_job(self._write, self._take())
+            await asyncio.wait([self._writing])
+            self._check_written()
+
+
+class CaptureReader:
+    """Memory-mapped, zero-copy reader for capture files.
+
+    Frames are memoryview slices of the mapping and are only valid while the
+    reader is open.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file = None
+        self._map = None
+
+    def __enter__(self) -> CaptureReader:
+        self._file = open(self.path, "rb")
+        if os.fstat(self._file.fileno()).st_size:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self._map[: len(MAGIC)] != MAGIC:
+                self.close()
+                raise ValueError(f"{self.path} is not an econest capture")
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def frames(self):
+        """Yield (receive time, frame) for every complete record."""
+        if self._map is None:
+            return
+        view = memoryview(self._map)
+        try:
+            offset = len(MAGIC)
+            end = len(view)
+            while offset + RECORD_HEAD.size <= end:
+                received, length = RECORD_HEAD.unpack_from(view, offset)
+                offset += RECORD_HEAD.size
+                if offset + length > end:
+                    break  # record cut short by a crash
+                frame = view[offset:offset + length]
+                yield received, frame
+                frame.release()
+                offset += length
+        finally:
+            view.release()
+
+
+async def replay(path: str, handle_message, speed: float | None = 1.0) -> int:
+    """Feed a capture through handle_message, returns the number of frames.
+
+    speed scales the recorded inter-frame delays, None replays as fast as possible.
+    """
+    count = 0
+    with CaptureReader(path) as reader:
+        frames = reader.frames()
+        start = first = None
+        try:
+            for received, frame in frames:
+                if speed:
+                    if first is None:
+                        first, start = received, time.monotonic()
+                    delay = (received - first) / speed - (time.monotonic() - start)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                await handle_message(frame)
+                count += 1
+        finally:
+            frames.close()
+    return count
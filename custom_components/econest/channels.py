@@ -0,0 +1,61 @@
+"""Detection of sub device channels that stay idle."""
+from __future__ import annotations
+
+from itertools import compress
+
+
+def channel_of(sensor_name: str) -> str | None:
+    """Return the sub device channel a sensor belongs to, None for the main channel."""
+    if not sensor_name.startswith("ecoSub_"):
+        return None
+    return sensor_name.rpartition("-")[0]
+
+
+class ChannelActivity:
+    """Track the last device timestamp each decoded sub device channel had non-zero power."""
+
+    def __init__(self) -> None:
+        self._channels = ()
+        self._indices = ()
+        self._last_active = []
+        self._known = {}
+        self._unseen = False
+        self.last_timestamp = None
+
+    @property
+    def channels(self) -> tuple[str, ...]:
+        return self._channels
+
+    def set_layout(self, layout) -> None:
+        """Follow the power readings of a new frame layout, keeping what is known per channel."""
+        self._known.update(zip(self._channels, self._last_active))
+        power = [
+            (channel_of(sensor_name), index)
+            for sensor_name, index in layout.slots
+            if sensor_name.startswith("ecoSub_") and sensor_name.endswith("-Power")
+        ]
+        self._channels = tuple(channel for channel, _ in power)
+        self._indices = tuple(index for _, index in power)
+        self._last_active = [self._known.get(channel) for channel in self._channels]
+        self._unseen = None in self._last_active
+
+    def observe(self, timestamp: int, fields) -> None:
+        """Note which channels of a decoded frame have non-zero power."""
+        last_active = self._last_active
+        if self._unseen:
+            # The first sample of a channel starts its idle time
+            last_active[:] = [timestamp if last is None else last for last in last_active]
+            self._unseen = False
+        for ind in compress(range(len(self._indices)), [fields[index] for index in self._indices]):
+            last_active[ind] = timestamp
+        self.last_timestamp = timestamp
+
+    def idle(self, period: float) -> list[str]:
+        """Return the channels without power for at least period seconds."""
+        if self.last_timestamp is None:
+            return []
+        return [
+            channel
+            for channel, last_active in zip(self._channels, self._last_active)
+            if self.last_timestamp - last_active >= period
+        ]
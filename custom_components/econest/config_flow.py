@@ -11,15 +11,41 @@ import voluptuous as vol
 from homeassistant import config_entries, exceptions
 from homeassistant.core import HomeAssistant
 
-from .econest_intelligent import EconestEnergy
+from .channels import channel_of
+from .econest_intelligent import EconestEnergy, serial_number_name
 
 from homeassistant.core import callback
+from homeassistant.helpers import config_validation as cv
 from homeassistant.components import zeroconf
-from homeassistant.config_entries import ConfigFlow, ConfigFlowResult
+from homeassistant.config_entries import (
+    ConfigEntry,
+    ConfigEntryState,
+    ConfigFlow,
+    ConfigFlowResult,
+    OptionsFlow,
+)
 from homeassistant.const import CONF_HOST, CONF_NAME, CONF_PORT
 from homeassistant.util.network import is_ip_address as is_ip
 
-from .const import DOMAIN, SERIAL_NUMBER
+from .const import (
+    CONF_AGGREGATE_POWER,
+    CONF_CAPTURE_FRAMES,
+    CONF_DEADBAND_ABSOLUTE,
+    CONF_DEADBAND_PERCENT,
+    CONF_DISABLED_CHANNELS,
+    CONF_IDLE_PERIOD,
+    CONF_LOG_DATA,
+    CONF_MAX_SILENCE,
+    CONF_MAX_UPDATE_RATE,
+    CONF_VERIFY_CRC,
+    DEFAULT_DEADBAND_ABSOLUTE,
+    DEFAULT_DEADBAND_PERCENT,
+    DEFAULT_IDLE_PERIOD,
+    DEFAULT_MAX_SILENCE,
+    DEFAULT_MAX_UPDATE_RATE,
+    DOMAIN,
+    SERIAL_NUMBER,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -31,17 +57,16 @@ DATA_SCHEMA = vol.Schema({("serial_number"): str, ("host"): str})
 
 async def validate_input(hass: HomeAssistant, data: dict) -> dict[str, Any]:
     """Validate the user input allows us to connect."""
-    serial_number = data["serial_number"]
-    if "econest-hems-" in serial_number:
-        serial_number_name = serial_number
-    else:
-        serial_number_name = "econest-hems-" + serial_number
-    econest_energy = EconestEnergy(hass, serial_number_name,  data["host"])
-    result = await econest_energy.check_connection()
+    name = serial_number_name(data["serial_number"])
+    econest_energy = EconestEnergy(hass, name,  data["host"])
+    try:
+        result = await econest_energy.check_connection()
+    finally:
+        await econest_energy.async_close()
     if not result:
         raise CannotConnect
 
-    return {"title": serial_number_name}
+    return {"title": name}
 
 
 class EconestFlowHandler(ConfigFlow, domain=DOMAIN):
@@ -52,11 +77,19 @@ class EconestFlowHandler(ConfigFlow, domain=DOMAIN):
         """Initialize the econest config flow."""
         self.discovered_conf: dict[str, Any] = {}
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
+        """Get the options flow for this handler."""
+        return EconestOptionsFlow()
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
         errors = {}
         if user_input is not None:
+            await self.async_set_unique_id(serial_number_name(user_input["serial_number"]))
+            self._abort_if_unique_id_configured()
             try:
                 info = await validate_input(self.hass, user_input)
                 return self.async_create_entry(title=info["title"], data=user_input)
@@ -81,21 +114,12 @@ class EconestFlowHandler(ConfigFlow, domain=DOMAIN):
         serial_number = discovery_info.name.removesuffix(HTTP_SUFFIX)
         return await self.async_step_confirm_discovery(host, serial_number)
 
-    def _async_get_existing_entry(self, serial_number: str):
-        for entry in self._async_current_entries():
-            if serial_number in [
-                name.removesuffix(HTTP_SUFFIX) for name in entry.data.get(SERIAL_NUMBER, [])
-            ]:
-                return entry
-        return None
-
     async def async_step_confirm_discovery(
         self, host: str, serial_number: str
     ) -> ConfigFlowResult:
         """Handle discovery confirm."""
         await self.async_set_unique_id(serial_number)
-        existing_entry = self._async_get_existing_entry(serial_number)
-        self._abort_if_unique_id_configured()
+        existing_entry = self.hass.config_entries.async_entry_for_domain_unique_id(DOMAIN, serial_number)
 
         if (
             existing_entry
@@ -105,11 +129,12 @@ class EconestFlowHandler(ConfigFlow, domain=DOMAIN):
             and ip(existing_entry.data[CONF_HOST]).version == ip(host).version
         ):
             _LOGGER.debug(
-                "Update host from '%s' to '%s' for NAS '%s' via discovery",
+                "Update host from '%s' to '%s' for device '%s' via discovery",
                 existing_entry.data[CONF_HOST],
                 host,
                 existing_entry.unique_id,
             )
+            # The entry's update listener moves the running stream to the new host
             self.hass.config_entries.async_update_entry(
                 existing_entry,
                 data={**existing_entry.data, CONF_HOST: host},
@@ -191,6 +216,78 @@ class EconestFlowHandler(ConfigFlow, domain=DOMAIN):
         return result
 
 
+class EconestOptionsFlow(OptionsFlow):
+    """Handle econest options."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Manage the publishing options."""
+        if user_input is not None:
+            return self.async_create_entry(data=user_input)
+
+        options = self.config_entry.options
+        disabled = set(options.get(CONF_DISABLED_CHANNELS, []))
+        idle_period = options.get(CONF_IDLE_PERIOD, DEFAULT_IDLE_PERIOD)
+        channels = set(disabled)
+        idle = []
+        if self.config_entry.state is ConfigEntryState.LOADED:
+            channels.update(
+                channel for channel in map(channel_of, self.config_entry.runtime_data.known_sensors) if channel
+            )
+        if sensor_manager := self.hass.data.get(DOMAIN, {}).get(self.config_entry.entry_id):
+            channels.update(sensor_manager.activity.channels)
+            idle = sensor_manager.activity.idle(idle_period * 3600)
+        return self.async_show_form(
+            step_id="init",
+            description_placeholders={"idle": ", ".join(idle) or "-"},
+            data_schema=vol.Schema({
+                vol.Optional(
+                    CONF_MAX_UPDATE_RATE,
+                    default=options.get(CONF_MAX_UPDATE_RATE, DEFAULT_MAX_UPDATE_RATE),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_DEADBAND_ABSOLUTE,
+                    default=options.get(CONF_DEADBAND_ABSOLUTE, DEFAULT_DEADBAND_ABSOLUTE),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_DEADBAND_PERCENT,
+                    default=options.get(CONF_DEADBAND_PERCENT, DEFAULT_DEADBAND_PERCENT),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
+                vol.Optional(
+                    CONF_MAX_SILENCE,
+                    default=options.get(CONF_MAX_SILENCE, DEFAULT_MAX_SILENCE),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_VERIFY_CRC,
+                    default=options.get(CONF_VERIFY_CRC, True),
+                ): bool,
+                vol.Optional(
+                    CONF_CAPTURE_FRAMES,
+                    default=options.get(CONF_CAPTURE_FRAMES, False),
+                ): bool,
+                vol.Optional(
+                    CONF_LOG_DATA,
+                    default=options.get(CONF_LOG_DATA, False),
+                ): bool,
+                vol.Optional(
+                    CONF_AGGREGATE_POWER,
+                    default=options.get(CONF_AGGREGATE_POWER, False),
+                ): bool,
+                # Idle channels are only suggested in the description, disabling
+                # removes their entities, so it has to be chosen explicitly
+                vol.Optional(
+                    CONF_DISABLED_CHANNELS,
+                    default=sorted(disabled),
+                ): cv.multi_select({channel: channel for channel in sorted(channels)}),
+                vol.Optional(
+                    CONF_IDLE_PERIOD,
+                    default=idle_period,
+                ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+            }),
+        )
+
+
 class CannotConnect(exceptions.HomeAssistantError):
     """Error to indicate we cannot connect."""
 
@@ -1,2 +1,21 @@
 DOMAIN = "econest"
 SERIAL_NUMBER = "serial_number"
+DATA_HUB = f"{DOMAIN}_hub"
+SIGNAL_FRAME = f"{DOMAIN}_frame_{{}}"  # formatted with the serial number name
+
+CONF_DEADBAND_ABSOLUTE = "deadband_absolute"
+CONF_DEADBAND_PERCENT = "deadband_percent"
+CONF_MAX_SILENCE = "max_silence"
+CONF_MAX_UPDATE_RATE = "max_update_rate"
+CONF_CAPTURE_FRAMES = "capture_frames"
+CONF_LOG_DATA = "log_data"
+CONF_AGGREGATE_POWER = "aggregate_power"
+CONF_DISABLED_CHANNELS = "disabled_channels"
+CONF_IDLE_PERIOD = "idle_period"
+CONF_VERIFY_CRC = "verify_crc"
+
+DEFAULT_DEADBAND_ABSOLUTE = 0
+DEFAULT_DEADBAND_PERCENT = 0
+DEFAULT_MAX_SILENCE = 300
+DEFAULT_MAX_UPDATE_RATE = 0  # Hz, 0 publishes every frame
+DEFAULT_IDLE_PERIOD = 24  # hours without power before a channel is suggested for disabling
@@ -0,0 +1,224 @@
+"""Binary frame decoder for the econest WebSocket stream.
+
+Packets are decoded through a table keyed by (packet type, header version),
+a version of None registers a decoder for every version of a type.
+
+Before decoding, the header length is checked against the payload size and
+a non-zero header crc against the CRC-32 of the payload. A frame failing
+either check, or shorter than its layout, raises InvalidFrame.
+"""
+from __future__ import annotations
+
+import struct
+from functools import lru_cache
+from zlib import crc32
+
+HEAD_FORMAT = "<IIII"  # version, crc, type, length
+SAMPLE_DATA_FORMAT = "IB"  # timeStamp, subDevNum
+CH_DATA_FORMAT = "iI"  # Power, Energy
+SUB_DEV_NUMBER_FORMAT = "B"  # number
+
+SAMPLE_DATA_TYPE = 2
+LOG_DATA_TYPE = 3
+SYNC_DATA_TYPE = 4
+SUB_DEV_CHANNELS = 10
+CH_DATA_KEYS = ("Power", "Energy")
+
+_HEAD = struct.Struct(HEAD_FORMAT)
+_SUB_DEV_NUM_OFFSET = _HEAD.size + 4
+
+# Payload of a frame with the most sub devices a one byte subDevNum can count
+MAX_PAYLOAD_SIZE = struct.calcsize(
+    "<" + SAMPLE_DATA_FORMAT + CH_DATA_FORMAT
+    + 255 * (SUB_DEV_NUMBER_FORMAT + SUB_DEV_CHANNELS * CH_DATA_FORMAT))
+
+# Field positions inside the tuple returned by FrameLayout.struct
+_VERSION, _CRC, _TYPE_INDEX, _LENGTH, _TIMESTAMP, _SUB_DEV_NUM = range(6)
+_MAIN_POWER = 6
+_SUB_DEV_START = 8
+# A disabled channel is skipped as pad bytes and yields no fields
+_CH_DATA_PAD = f"{struct.calcsize('<' + CH_DATA_FORMAT)}x"
+
+
+class InvalidFrame(ValueError):
+    """A frame is truncated, has a wrong length or fails its crc."""
+
+
+def channel_name(sub_ind: int, ch_ind: int) -> str:
+    """Return the name of a sub device channel, the prefix of its sensor names."""
+    return f"ecoSub_{sub_ind}-channel_{ch_ind + 1}"
+
+
+class FrameLayout:
+    """Compiled layout of a sample data frame with a given subDevNum.
+
+    Channels named in disabled are not decoded at all.
+    """
+
+    __slots__ = ("sub_dev_num", "disabled", "struct", "size", "slots", "sub_dev_index", "channel_index")
+
+    def __init__(self, sub_dev_num: int, disabled: frozenset[str] = frozenset()) -> None:
+        self.sub_dev_num = sub_dev_num
+        self.disabled = disabled
+        fmt = HEAD_FORMAT + SAMPLE_DATA_FORMAT + CH_DATA_FORMAT
+
+        # (sensor name, field position) for every decoded reading in the frame
+        slots = [
+            (f"ecoMain-{key}", _MAIN_POWER + ind) for ind, key in enumerate(CH_DATA_KEYS)
+        ]
+        sub_dev_index = []
+        channel_index = {}
+        index = _SUB_DEV_START
+        for sub_ind in range(sub_dev_num):
+            fmt += SUB_DEV_NUMBER_FORMAT
+            sub_dev_index.append(index)
+            index += 1
+            for ch_ind in range(SUB_DEV_CHANNELS):
+                sub_ch_name = channel_name(sub_ind, ch_ind)
+                if sub_ch_name in disabled:
+                    fmt += _CH_DATA_PAD
+                    continue
+                fmt += CH_DATA_FORMAT
+                channel_index[(sub_ind, ch_ind)] = index
+                for key in CH_DATA_KEYS:
+                    slots.append((f"{sub_ch_name}-{key}", index))
+                    index += 1
+        self.struct = struct.Struct(fmt)
+        self.size = self.struct.size
+        self.slots = tuple(slots)
+        self.sub_dev_index = tuple(sub_dev_index)
+        self.channel_index = channel_index
+
+
+@lru_cache(maxsize=None)
+def get_layout(sub_dev_num: int, disabled: frozenset[str] = frozenset()) -> FrameLayout:
+    """Return the cached layout for subDevNum and a set of disabled channels."""
+    return FrameLayout(sub_dev_num, disabled)
+
+
+class SampleFrame:
+    """Flat record of one decoded sample data frame."""
+
+    __slots__ = ("layout", "fields")
+
+    packet_type = SAMPLE_DATA_TYPE
+
+    def __init__(self, layout: FrameLayout, fields: tuple[int, ...]) -> None:
+        self.layout = layout
+        self.fields = fields
+
+    @property
+    def version(self) -> int:
+        return self.fields[_VERSION]
+
+    @property
+    def crc(self) -> int:
+        return self.fields[_CRC]
+
+    @property
+    def length(self) -> int:
+        return self.fields[_LENGTH]
+
+    @property
+    def timestamp(self) -> int:
+        return self.fields[_TIMESTAMP]
+
+    @property
+    def sub_dev_num(self) -> int:
+        return self.fields[_SUB_DEV_NUM]
+
+    @property
+    def main_power(self) -> int:
+        return self.fields[_MAIN_POWER]
+
+    @property
+    def main_energy(self) -> int:
+        return self.fields[_MAIN_POWER + 1]
+
+
+class LogFrame(SampleFrame):
+    """Log record, a past sample in the sample data layout."""
+
+    __slots__ = ()
+
+    packet_type = LOG_DATA_TYPE
+
+
+class SyncFrame(LogFrame):
+    """Sync record, history sent while syncEnable is set."""
+
+    __slots__ = ()
+
+    packet_type = SYNC_DATA_TYPE
+
+
+DECODERS = {}
+
+
+def register_decoder(packet_type: int, version: int | None = None):
+    """Register the decorated function as the decoder of a packet type."""
+    def register(decoder):
+        DECODERS[(packet_type, version)] = decoder
+        return decoder
+    return register
+
+
+def check_frame(view: memoryview, verify_crc: bool = True) -> tuple[int, int, int, int]:
+    """Validate length and crc of a frame without copying it, returns its header.
+
+    A crc of 0 means the device did not fill one in. Without verify_crc
+    only the header has to be there, the payload is still checked against
+    the layout size when it is unpacked.
+    """
+    if len(view) < _HEAD.size:
+        raise InvalidFrame(f"{len(view)} bytes is shorter than the header")
+    head = _HEAD.unpack_from(view)
+    if not verify_crc:
+        return head
+    if head[3] != len(view) - _HEAD.size:
+        raise InvalidFrame(f"length {head[3]} does not match the {len(view) - _HEAD.size} byte payload")
+    if head[1] and crc32(view[_HEAD.size:]) != head[1]:
+        raise InvalidFrame("crc mismatch")
+    return head
+
+
+def decode_packet(data, disabled: frozenset[str] = frozenset(), verify_crc: bool = True) -> SampleFrame | None:
+    """Decode any packet with a registered decoder, None for unknown ones."""
+    view = memoryview(data)
+    version, _, packet_type, _ = check_frame(view, verify_crc)
+    decoder = DECODERS.get((packet_type, version)) or DECODERS.get((packet_type, None))
+    if decoder is None:
+        return None
+    return decoder(view, disabled)
+
+
+def _unpack(view, disabled) -> tuple[FrameLayout, tuple[int, ...]]:
+    if len(view) <= _SUB_DEV_NUM_OFFSET:
+        raise InvalidFrame("frame ends before subDevNum")
+    layout = get_layout(view[_SUB_DEV_NUM_OFFSET], disabled)
+    if len(view) < layout.size:
+        raise InvalidFrame(f"{len(view)} bytes is shorter than the {layout.size} byte layout")
+    return layout, layout.struct.unpack_from(view)
+
+
+@register_decoder(SAMPLE_DATA_TYPE)
+def decode_sample(view, disabled=frozenset()) -> SampleFrame:
+    return SampleFrame(*_unpack(view, disabled))
+
+
+@register_decoder(LOG_DATA_TYPE)
+def decode_log(view, disabled=frozenset()) -> LogFrame:
+    return LogFrame(*_unpack(view, disabled))
+
+
+@register_decoder(SYNC_DATA_TYPE)
+def decode_sync(view, disabled=frozenset()) -> SyncFrame:
+    return SyncFrame(*_unpack(view, disabled))
+
+
+def decode_frame(data, disabled: frozenset[str] = frozenset(), verify_crc: bool = True) -> SampleFrame | None:
+    """Decode a sample data frame, None for any other packet type."""
+    view = memoryview(data)
+    if check_frame(view, verify_crc)[2] != SAMPLE_DATA_TYPE:
+        return None
+    return SampleFrame(*_unpack(view, disabled))
@@ -0,0 +1,33 @@
+"""Diagnostics support for econest."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.core import HomeAssistant
+
+from . import EconestConfigEntry
+from .const import DOMAIN
+
+TO_REDACT = {"uuid"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: EconestConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    econest_energy = entry.runtime_data
+    sensor_manager = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    return async_redact_data(
+        {
+            "entry": {"data": dict(entry.data), "options": dict(entry.options)},
+            "device": {
+                "uuid": econest_energy.uuid,
+                "econest_type": econest_energy.econest_type,
+                "endpoint": econest_energy.endpoint,
+                "known_sensors": len(econest_energy.known_sensors),
+            },
+            "performance": sensor_manager.diagnostics() if sensor_manager else None,
+        },
+        TO_REDACT,
+    )
@@ -1,135 +1,272 @@
 from __future__ import annotations
+import asyncio
+import contextlib
 import json
 import aiohttp
 
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 30
+# Device seconds between saves of last_timestamp, longer than SAVE_DELAY so
+# a steady stream does not keep postponing the delayed save
+CHECKPOINT_INTERVAL = 60
+
+# Delay between starting the serial / .local / host candidates of a race
+STAGGER_DELAY = 0.25
+# Per-request bounds, the aiohttp default would wait up to 5 minutes
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=15, connect=5, sock_read=10)
+
+
+async def async_remove_cache(hass: HomeAssistant, serial_number_name: str) -> None:
+    """Remove the session cache of a device."""
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{serial_number_name}").async_remove()
+
+
+def serial_number_name(serial_number: str) -> str:
+    """Return the econest-hems-<serial> name of a device."""
+    if "econest-hems-" in serial_number:
+        return serial_number
+    return "econest-hems-" + serial_number
+
+
+class RequestFailed(Exception):
+    """The device answered with a non-200 status."""
 
 
 class EconestEnergy:
 
-    def __init__(self, hass: HomeAssistant, serial_number_name: str, host: str) -> None:
+    def __init__(self, hass: HomeAssistant, serial_number_name: str, host: str,
+                 session: aiohttp.ClientSession | None = None) -> None:
         self.serial_number_name = serial_number_name
         self.serial_number = serial_number_name.split("-")[-1]
         self._hass = hass
         self._host = host
         self.econest_type = 2
+        self.endpoint = None
+        self.uuid = None
+        self.known_sensors = []
+        self.last_timestamp = None
+        self._checkpoint = None
+        self.backfill_window = None
+        # Log and sync streams requested, and as last acknowledged by the device
+        self.log_data = False
+        self.log_data_enabled = False
+        self._store = None
         self.uuid_url = "http://{}/register"
         self.sync_url = "http://{}/sync"
         self.data_url = "http://{}/data-ctrl"
         self.main_info_url = "http://{}/system-info"
+        self._session = session
+        self._owns_session = session is None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Return the session shared by all requests to this device."""
+        if self._session is None or self._session.closed:
+            self._session = async_create_clientsession(
+                self._hass, auto_cleanup=False, timeout=REQUEST_TIMEOUT)
+            self._owns_session = True
+        return self._session
+
+    async def async_close(self) -> None:
+        """Save the session cache and close the session unless it is shared with other devices."""
+        if self._store is not None:
+            await self._store.async_save(self._cache_data())
+        if self._owns_session and self._session is not None:
+            # Sessions of Home Assistant share its connector, they are detached rather than closed
+            self._session.detach()
+            self._session = None
+
+    async def async_load_cache(self) -> None:
+        """Restore uuid, endpoint and known sensors from the last run."""
+        self._store = Store(self._hass, STORAGE_VERSION, f"{DOMAIN}.{self.serial_number_name}")
+        data = await self._store.async_load()
+        if data:
+            self.uuid = data.get("uuid")
+            self.econest_type = data.get("econest_type", self.econest_type)
+            self.endpoint = data.get("endpoint")
+            self.known_sensors = data.get("sensors", [])
+            self.last_timestamp = data.get("last_timestamp")
+            self.backfill_window = data.get("backfill_window")
+            self.log_data_enabled = data.get("log_data_enabled", False)
+
+    def _cache_data(self):
+        return {
+            "uuid": self.uuid,
+            "econest_type": self.econest_type,
+            "endpoint": self.endpoint,
+            "sensors": self.known_sensors,
+            "last_timestamp": self.last_timestamp,
+            "backfill_window": self.backfill_window,
+            "log_data_enabled": self.log_data_enabled,
+        }
+
+    def async_save_cache(self) -> None:
+        """Schedule a save of the session cache."""
+        if self._store is not None:
+            self._store.async_delay_save(self._cache_data, SAVE_DELAY)
+
+    def set_last_timestamp(self, timestamp) -> None:
+        """Track the newest live timestamp, the start of the next backfill."""
+        self.last_timestamp = timestamp
+        if self._checkpoint is None or abs(timestamp - self._checkpoint) >= CHECKPOINT_INTERVAL:
+            self._checkpoint = timestamp
+            self.async_save_cache()
+
+    def add_known_sensor(self, sensor_name) -> None:
+        """Remember a sensor so it can be created up front next time."""
+        self.known_sensors.append(sensor_name)
+        self.async_save_cache()
+
+    def set_host(self, host) -> None:
+        """Move to a new device address, keeping the uuid and the session."""
+        self._host = host
+        if self.econest_type == "host" and self.endpoint is not None:
+            self.endpoint = host
+            self.async_save_cache()
+
+    def candidates(self, host):
+        """Return (econest_type, endpoint) in order of preference."""
+        return (
+            ("serial_number", self.serial_number_name),
+            ("serial_number_local", self.serial_number_name + ".local"),
+            ("host", host),
+        )
+
+    async def _attempt(self, method, url, handle, **kwargs):
+        async with self.session.request(method, url, **kwargs) as response:
+            if response.status != 200:
+                raise RequestFailed(response.status)
+            return await handle(response)
+
+    async def _race(self, method, url_template, host, handle, **kwargs):
+        """Try all candidates concurrently with staggered starts, first success wins.
+
+        Each candidate starts STAGGER_DELAY after the previous one, or as soon
+        as the previous one has failed.
+        """
+        candidates = self.candidates(host)
+        started = [asyncio.Event() for _ in candidates]
+        failed = [asyncio.Event() for _ in candidates]
+
+        async def attempt(ind, econest_type, endpoint):
+            if ind:
+                # The delay runs from the previous candidate's start, not from task creation
+                await started[ind - 1].wait()
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(failed[ind - 1].wait(), STAGGER_DELAY)
+            started[ind].set()
+            try:
+                result = await self._attempt(method, url_template.format(endpoint), handle, **kwargs)
+            except BaseException:
+                failed[ind].set()
+                raise
+            return econest_type, endpoint, result
+
+        tasks = [
+            asyncio.create_task(attempt(ind, econest_type, endpoint))
+            for ind, (econest_type, endpoint) in enumerate(candidates)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    econest_type, endpoint, result = await next_done
+                except (aiohttp.ClientError, asyncio.TimeoutError, RequestFailed):
+                    continue
+                self.econest_type = econest_type
+                self.endpoint = endpoint
+                self.async_save_cache()
+                return result
+        finally:
+            for task in tasks:
+                task.cancel()
+        return None
+
+    async def _request(self, method, url_template, host, handle, **kwargs):
+        """Send a request to the cached endpoint, racing all candidates after a failure.
+
+        Only GET requests are raced. A POST registers or starts something on
+        the device, so it is sent once to the winner of a /system-info race.
+        """
+        if self.endpoint is not None:
+            try:
+                return await self._attempt(method, url_template.format(self.endpoint), handle, **kwargs)
+            except (aiohttp.ClientError, asyncio.TimeoutError, RequestFailed):
+                self.endpoint = None
+        if method == "GET":
+            return await self._race(method, url_template, host, handle, **kwargs)
+        if await self._race("GET", self.main_info_url, host, _accept) is None:
+            return None
+        try:
+            return await self._attempt(method, url_template.format(self.endpoint), handle, **kwargs)
+        except (aiohttp.ClientError, asyncio.TimeoutError, RequestFailed):
+            self.endpoint = None
+            return None
+
+    async def resolve_endpoint(self, host):
+        """Race the candidates again and cache the winner."""
+        self.endpoint = None
+        return await self.check_connection(host)
+
+    async def handshake(self, host):
+        """Register a uuid and enable the real-time data stream, plus the log streams if requested."""
+        uuid = await self.register_uuid(host)
+        if uuid and await self.data_ctrl(uuid, host):
+            self.uuid = uuid
+            self.async_save_cache()
+            return uuid
+        return None
 
     async def register_uuid(self, host):
         """Register a UUID."""
         data = {"user": self.serial_number,
                 "password": "cyber2019"}
         json_data = json.dumps(data)
-        for ind in range(3):
-            if ind == 0:
-                url = self.uuid_url.format(self.serial_number_name)
-                self.econest_type = "serial_number"
-            elif ind == 1:
-                url = self.uuid_url.format(self.serial_number_name + ".local")
-                self.econest_type = "serial_number_local"
-            else:
-                url = self.uuid_url.format(host)
-                self.econest_type = "host"
-            try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(url, data=json_data) as response:
-                        if response.status == 200:
-                            data = await response.json()
-                            res = data.get("uuid", None)
-                            break
-                        else:
-                            res = None
-                            continue
-            except aiohttp.ClientError as e:
-                # raise Exception(self.uuid_url2, e)
-                # 处理网络错误
-                res = None
-                continue
-        return res
-
-    async def sync_data(self, device_uuid, host):
-        """Sampling data synchronization settings"""
+
+        async def handle(response):
+            data = await response.json()
+            return data.get("uuid", None)
+
+        return await self._request("POST", self.uuid_url, host, handle, data=json_data)
+
+    async def sync_data(self, device_uuid, host, timestamp_from=0, timestamp_to=0, handle=None):
+        """Sampling data synchronization settings
+
+        handle receives the streamed response of the requested window.
+        """
         data = {"uuid": device_uuid,
-                "timestampFrom": 0,
-                "timestampTo": 0}
+                "timestampFrom": timestamp_from,
+                "timestampTo": timestamp_to}
         json_data = json.dumps(data)
-        for ind in range(3):
-            if ind == 0:
-                url = self.sync_url.format(self.serial_number_name)
-            elif ind == 1:
-                url = self.sync_url.format(self.serial_number_name + ".local")
-            else:
-                url = self.sync_url.format(host)
-            try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(url, data=json_data) as response:
-                        if response.status == 200:
-                            res = True
-                            break
-                        else:
-                            res = False
-                            continue
-            except aiohttp.ClientError as e:
-                # 处理网络错误
-                res = False
-                continue
-        return res
+        res = await self._request("POST", self.sync_url, host, handle or _accept, data=json_data)
+        return res is not None
 
     async def data_ctrl(self, device_uuid, host):
         """Data transmission control"""
         data = {"uuid": device_uuid,
                 "rtdataEnable": 1,
-                "syncEnable": 0,
-                "logdataEnable": 0}
+                "syncEnable": int(self.log_data),
+                "logdataEnable": int(self.log_data)}
         json_data = json.dumps(data)
-        for ind in range(3):
-            if ind == 0:
-                url = self.data_url.format(self.serial_number_name)
-            elif ind == 1:
-                url = self.data_url.format(self.serial_number_name + ".local")
-            else:
-                url = self.data_url.format(host)
-            try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(url, data=json_data) as response:
-                        if response.status == 200:
-                            res = True
-                            break
-                        else:
-                            res = False
-                            continue
-            except aiohttp.ClientError as e:
-                # 处理网络错误
-                res = False
-                continue
-        return res
-
-    async def check_connection(self) -> bool:
-        """Test connection."""
-        for ind in range(3):
-            if ind == 0:
-                url = self.main_info_url.format(self.serial_number_name)
-            elif ind == 1:
-                url = self.main_info_url.format(self.serial_number_name + ".local")
-            else:
-                url = self.main_info_url.format(self._host)
-            try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url) as response:
-                        if response.status == 200:
-                            res = True
-                            break
-                        else:
-                            res = False
-                            continue
-            except aiohttp.ClientError as e:
-                # 处理网络错误
-                res = False
-                continue
-        return res
+        res = await self._request("POST", self.data_url, host, _accept, data=json_data)
+        if res is None:
+            return False
+        if self.log_data_enabled != self.log_data:
+            self.log_data_enabled = self.log_data
+            self.async_save_cache()
+        return True
 
+    async def check_connection(self, host=None) -> bool:
+        """Test connection."""
+        res = await self._request("GET", self.main_info_url, host or self._host, _accept)
+        return res is not None
 
 
+async def _accept(response):
+    """Response handler for requests that only need a 200 status."""
+    return True
@@ -0,0 +1,40 @@
+"""Bounded buffer between the WebSocket receive loop and frame processing."""
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+
+DEFAULT_FRAME_QUEUE_SIZE = 32
+
+
+class FrameQueue:
+    """Frame buffer that drops the oldest frame when it is full."""
+
+    def __init__(self, maxlen: int = DEFAULT_FRAME_QUEUE_SIZE) -> None:
+        self._frames = deque(maxlen=maxlen)
+        self._ready = asyncio.Event()
+        self.received = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    @property
+    def depth(self) -> int:
+        """Number of frames waiting to be processed."""
+        return len(self._frames)
+
+    def put(self, frame) -> None:
+        """Queue a frame without waiting, evicting the oldest one if full."""
+        if len(self._frames) == self._frames.maxlen:
+            self.dropped += 1
+        self._frames.append(frame)
+        self.received += 1
+        self._ready.set()
+
+    async def get(self):
+        """Wait for and return the oldest queued frame."""
+        while not self._frames:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._frames.popleft()
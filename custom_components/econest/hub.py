@@ -0,0 +1,79 @@
+"""Domain-level hub that runs the WebSocket streams of all econest devices."""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import random
+
+import aiohttp
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+
+from .const import DATA_HUB
+from .econest_intelligent import REQUEST_TIMEOUT
+
+# aiohttp heartbeat, a missing pong closes the connection after half of it
+HEARTBEAT_INTERVAL = 10
+# Wait for the device's close reply, a half-open peer never sends one and
+# aiohttp would wait 10 seconds before dropping the socket
+WS_TIMEOUT = aiohttp.ClientWSTimeout(ws_close=1)
+# Connection attempts in flight at once across all devices
+MAX_CONCURRENT_CONNECTS = 4
+RECONNECT_BASE_DELAY = 1
+RECONNECT_MAX_DELAY = 300
+
+
+def reconnect_delay(attempt: int) -> float:
+    """Exponential backoff with jitter for the given failed attempt (0 based)."""
+    delay = min(RECONNECT_MAX_DELAY, RECONNECT_BASE_DELAY * 2 ** attempt)
+    return random.uniform(delay / 2, delay)
+
+
+@callback
+def async_get_hub(hass: HomeAssistant) -> EconestHub:
+    """Return the hub, creating it on first use."""
+    hub = hass.data.get(DATA_HUB)
+    if hub is None:
+        hub = hass.data[DATA_HUB] = EconestHub(hass)
+    return hub
+
+
+class EconestHub:
+    """Own the shared session and schedule connect and reconnect of every device."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        # Not tied to the entry that happens to create the hub
+        self.session = async_create_clientsession(hass, auto_cleanup=False, timeout=REQUEST_TIMEOUT)
+        self._managers = {}
+        self._connect_slots = asyncio.Semaphore(MAX_CONCURRENT_CONNECTS)
+
+    @contextlib.asynccontextmanager
+    async def connect_slot(self):
+        """Limit how many devices connect at the same time."""
+        async with self._connect_slots:
+            yield
+
+    @callback
+    def async_start_manager(self, entry_id, sensor_manager) -> None:
+        """Run a device's WebSocket stream under the hub."""
+        task = self.hass.async_create_background_task(
+            sensor_manager.start(), f"econest stream {entry_id}"
+        )
+        self._managers[entry_id] = (sensor_manager, task)
+
+    async def async_stop_manager(self, entry_id) -> None:
+        """Stop a device's stream, closing the hub after the last one."""
+        sensor_manager, task = self._managers.pop(entry_id, (None, None))
+        if sensor_manager is not None:
+            sensor_manager.stop()
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        if not self._managers:
+            await self.async_close()
+
+    async def async_close(self) -> None:
+        self.session.detach()
+        if self.hass.data.get(DATA_HUB) is self:
+            del self.hass.data[DATA_HUB]
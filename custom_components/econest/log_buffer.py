@@ -0,0 +1,145 @@
+"""Time-indexed ring buffer of device log records."""
+from __future__ import annotations
+
+import heapq
+from array import array
+from operator import attrgetter, itemgetter
+
+DEFAULT_LOG_BUFFER_SIZE = 4096
+
+
+class _Ring:
+    """Preallocated ring of the records of one packet type, in timestamp order."""
+
+    __slots__ = ("capacity", "width", "timestamps", "values", "start", "count")
+
+    def __init__(self, capacity: int, width: int) -> None:
+        self.capacity = capacity
+        self.width = width
+        self.timestamps = array("I", bytes(4 * capacity))
+        self.values = array("q", bytes(8 * capacity * width))
+        self.start = 0
+        self.count = 0
+
+    def position(self, ind: int) -> int:
+        return (self.start + ind) % self.capacity
+
+    @property
+    def first(self) -> int | None:
+        return self.timestamps[self.start] if self.count else None
+
+    @property
+    def last(self) -> int | None:
+        return self.timestamps[self.position(self.count - 1)] if self.count else None
+
+    def append(self, timestamp: int, row: array) -> bool:
+        """Store a record, evicting the oldest one when full. False if it is not newer than the last."""
+        if self.count and timestamp <= self.last:
+            return False
+        if self.count == self.capacity:
+            pos = self.start
+            self.start = self.position(1)
+        else:
+            pos = self.position(self.count)
+            self.count += 1
+        self.timestamps[pos] = timestamp
+        base = pos * self.width
+        self.values[base:base + self.width] = row
+        return True
+
+    def bisect(self, timestamp: int) -> int:
+        """First record index with a timestamp at or after timestamp."""
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            if self.timestamps[self.position(mid)] < timestamp:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def column(self, column: int, start: int, end: int | None):
+        """Yield (timestamp, value) of a column for start <= timestamp < end."""
+        last = self.count if end is None else self.bisect(end)
+        for ind in range(self.bisect(start), last):
+            pos = self.position(ind)
+            yield self.timestamps[pos], self.values[pos * self.width + column]
+
+    def newest(self) -> array:
+        """Return the readings of the newest record."""
+        pos = self.position(self.count - 1)
+        return self.values[pos * self.width:(pos + 1) * self.width]
+
+
+class LogBuffer:
+    """Log records kept in preallocated rings of flat arrays.
+
+    Timestamps live in one array and the readings of record i in a row of
+    len(layout.slots) values, so a record costs 4 bytes plus 8 per reading
+    and no Python objects. Each packet type has a ring of capacity records:
+    sync records carry history older than the live log records and would
+    otherwise be rejected behind them. A ring is kept in timestamp order, a
+    record that is not newer than the last one of its ring is counted as a
+    duplicate. A change of the frame layout starts the buffer over.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_LOG_BUFFER_SIZE) -> None:
+        self.capacity = capacity
+        self.layout = None
+        self._rings = {}
+        self._columns = {}
+        self._getter = None
+        self.records = 0
+        self.duplicates = 0
+
+    def __len__(self) -> int:
+        return sum(ring.count for ring in self._rings.values())
+
+    def _reset(self, layout) -> None:
+        self.layout = layout
+        self._rings = {}
+        self._columns = {sensor_name: column for column, (sensor_name, _) in enumerate(layout.slots)}
+        self._getter = itemgetter(*(index for _, index in layout.slots))
+
+    def append(self, frame) -> None:
+        """Store a decoded log or sync record, evicting the oldest one of its type when full."""
+        if frame.layout is not self.layout:
+            self._reset(frame.layout)
+        ring = self._rings.get(frame.packet_type)
+        if ring is None:
+            ring = self._rings[frame.packet_type] = _Ring(self.capacity, len(self._columns))
+        if ring.append(frame.timestamp, array("q", self._getter(frame.fields))):
+            self.records += 1
+        else:
+            self.duplicates += 1
+
+    def series(self, sensor_name: str, start: int = 0, end: int | None = None) -> list[tuple[int, int]]:
+        """Return (timestamp, value) of a sensor for start <= timestamp < end."""
+        column = self._columns.get(sensor_name)
+        if column is None:
+            return []
+        result = []
+        for record in heapq.merge(*(ring.column(column, start, end) for ring in self._rings.values())):
+            if result and result[-1][0] == record[0]:
+                continue  # the same sample as a log and a sync record
+            result.append(record)
+        return result
+
+    def latest(self) -> tuple[int, dict[str, int]] | None:
+        """Return the timestamp and readings of the newest record."""
+        rings = [ring for ring in self._rings.values() if ring.count]
+        if not rings:
+            return None
+        ring = max(rings, key=attrgetter("last"))
+        return ring.last, dict(zip(self._columns, ring.newest()))
+
+    def as_dict(self) -> dict:
+        rings = [ring for ring in self._rings.values() if ring.count]
+        return {
+            "capacity": self.capacity,
+            "size": len(self),
+            "records": self.records,
+            "duplicates": self.duplicates,
+            "first_timestamp": min((ring.first for ring in rings), default=None),
+            "last_timestamp": max((ring.last for ring in rings), default=None),
+        }
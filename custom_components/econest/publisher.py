@@ -0,0 +1,45 @@
+"""Rate-limited, latest-value-wins publishing of sensor states."""
+from __future__ import annotations
+
+from datetime import timedelta
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+
+
+class PublishScheduler:
+    """Keep the latest value per sensor and flush them on a fixed tick."""
+
+    def __init__(self, hass: HomeAssistant, max_update_rate: float, publish) -> None:
+        self._hass = hass
+        self._interval = timedelta(seconds=1 / max_update_rate)
+        self._publish = publish
+        self._pending = {}
+        self._unsub = None
+
+    def submit(self, sensor, value):
+        """Record the latest value of a sensor for the next tick."""
+        self._pending[sensor] = value
+
+    @callback
+    def async_start(self):
+        """Start the flush timer."""
+        if self._unsub is None:
+            self._unsub = async_track_time_interval(
+                self._hass, self._async_flush, self._interval, name="econest publish"
+            )
+
+    @callback
+    def async_stop(self):
+        """Stop the flush timer and drop pending values."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+        self._pending = {}
+
+    @callback
+    def _async_flush(self, now=None):
+        """Publish every sensor that changed since the last tick."""
+        pending, self._pending = self._pending, {}
+        for sensor, value in pending.items():
+            self._publish(sensor, value)
@@ -1,22 +1,58 @@
 """Platform for sensor integration."""
 import aiohttp
 import asyncio
+import contextlib
 import logging
-import struct
+import time
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
 )
-from homeassistant.const import UnitOfPower
+from homeassistant.const import EntityCategory, UnitOfEnergy, UnitOfPower, UnitOfTime
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.entity import Entity
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from . import EconestConfigEntry
-from .const import DOMAIN
+from .aggregation import PowerAggregation
+from .backfill import Backfill
+from .capture import CaptureWriter
+from .channels import ChannelActivity, channel_of
+from .const import (
+    CONF_AGGREGATE_POWER,
+    CONF_CAPTURE_FRAMES,
+    CONF_DISABLED_CHANNELS,
+    CONF_LOG_DATA,
+    CONF_MAX_UPDATE_RATE,
+    CONF_VERIFY_CRC,
+    DEFAULT_MAX_UPDATE_RATE,
+    DOMAIN,
+)
+from .decoder import SAMPLE_DATA_TYPE, InvalidFrame, decode_packet
+from .frame_queue import FrameQueue
+from .hub import HEARTBEAT_INTERVAL, WS_TIMEOUT, async_get_hub, reconnect_delay
+from .log_buffer import LogBuffer
+from .publisher import PublishScheduler
+from .snapshot import FrameSnapshot, signal_frame
+from .state_filter import StateFilter
+from .stats import ManagerStats
 
 _LOGGER = logging.getLogger(__name__)
 
+# A connection with no frame for STALL_FACTOR times the observed frame
+# interval is torn down, bounded by these limits in seconds
+STALL_FACTOR = 5
+MIN_STALL_TIMEOUT = 2
+MAX_STALL_TIMEOUT = 60
+# Upgrade statuses that mean the cached uuid is no longer known to the device
+UUID_REJECTED = (401, 403)
+# Frames in a row that fail only the length or crc check before a warning
+# that the firmware may use another convention
+MAX_INTEGRITY_FAILURES = 10
+
 
 async def async_setup_entry(
         hass: HomeAssistant,
@@ -25,19 +61,57 @@ async def async_setup_entry(
     """Set up sensor platform"""
     econest_energy = config_entry.runtime_data
     host = config_entry.data["host"]
-    uuid = await econest_energy.register_uuid(host)
-    if uuid:
-        data_ctrl_res = await econest_energy.data_ctrl(uuid, host)
-        if data_ctrl_res:
-            sensor_manager = WebSocketSensorManager(hass, async_add_entities, econest_energy, uuid, host)
-            hass.data.setdefault(DOMAIN, {})[config_entry.entry_id] = sensor_manager
-            hass.loop.create_task(sensor_manager.start())
+    state_filter = StateFilter.from_options(config_entry.options)
+    max_update_rate = config_entry.options.get(CONF_MAX_UPDATE_RATE, DEFAULT_MAX_UPDATE_RATE)
+    disabled_channels = frozenset(config_entry.options.get(CONF_DISABLED_CHANNELS, ()))
+    async_remove_disabled_sensors(hass, econest_energy, disabled_channels)
+    sensor_manager = WebSocketSensorManager(
+        hass, async_add_entities, econest_energy, econest_energy.uuid, host, state_filter, max_update_rate,
+        async_get_hub(hass))
+    sensor_manager.disabled_channels = disabled_channels
+    sensor_manager.verify_crc = config_entry.options.get(CONF_VERIFY_CRC, True)
+    sensor_manager.backfill = Backfill(
+        hass, econest_energy, host, disabled_channels, sensor_manager.verify_crc)
+    if config_entry.options.get(CONF_CAPTURE_FRAMES):
+        sensor_manager.recorder = CaptureWriter(
+            hass, hass.config.path(DOMAIN, f"{econest_energy.serial_number_name}.ecap"))
+    if config_entry.options.get(CONF_LOG_DATA):
+        sensor_manager.log_buffer = LogBuffer()
+    if config_entry.options.get(CONF_AGGREGATE_POWER):
+        sensor_manager.aggregation = PowerAggregation(hass)
+    hass.data.setdefault(DOMAIN, {})[config_entry.entry_id] = sensor_manager
+    sensor_manager.add_known_sensors()
+    async_add_entities(
+        EconestDiagnosticSensor(econest_energy, sensor_manager, *description)
+        for description in DIAGNOSTIC_SENSORS
+    )
+    async_get_hub(hass).async_start_manager(config_entry.entry_id, sensor_manager)
+
+
+def async_remove_disabled_sensors(hass, econest_energy, disabled_channels):
+    """Forget the sensors of disabled channels and remove their entities"""
+    if not disabled_channels:
+        return
+    entity_registry = er.async_get(hass)
+    known_sensors = []
+    for sensor_name in econest_energy.known_sensors:
+        if channel_of(sensor_name) not in disabled_channels:
+            known_sensors.append(sensor_name)
+            continue
+        entity_id = entity_registry.async_get_entity_id(
+            "sensor", DOMAIN, f"{econest_energy.serial_number_name}_{sensor_name}")
+        if entity_id:
+            entity_registry.async_remove(entity_id)
+    if len(known_sensors) != len(econest_energy.known_sensors):
+        econest_energy.known_sensors = known_sensors
+        econest_energy.async_save_cache()
 
 
 class WebSocketSensorManager:
     """Classes for managing WebSocket connections and sensors"""
 
-    def __init__(self, hass, async_add_entities, econest_energy, uuid, host):
+    def __init__(self, hass, async_add_entities, econest_energy, uuid, host, state_filter=None,
+                 max_update_rate=0, hub=None):
         self.hass = hass
         self.async_add_entities = async_add_entities
         self.sensors = {}
@@ -47,46 +121,89 @@ class WebSocketSensorManager:
         self.uuid = uuid
         self.host = host
         self.ws = None
+        self.hub = hub
+        self.state_filter = state_filter or StateFilter()
+        self.frames = FrameQueue()
+        self._consumer = None
+        self._layout = None
+        self._routes = ()
+        self.recorder = None
+        self.stats = ManagerStats()
+        self._connections = 0
+        self._failures = 0
+        self._frame_interval = None
+        self._new_connection = False
+        self._reconnect = asyncio.Event()
+        self.backfill = None
+        self.log_buffer = None
+        self.aggregation = None
+        self.disabled_channels = frozenset()
+        self.verify_crc = True
+        self._integrity_failures = 0
+        self.activity = ChannelActivity()
+        self.signal = signal_frame(econest_energy.serial_number_name)
+        self.publisher = None
+        if max_update_rate:
+            self.publisher = PublishScheduler(hass, max_update_rate, self.publish)
 
     async def start(self):
         """Start WebSocket client"""
+        if self.publisher:
+            self.publisher.async_start()
+        if self.aggregation:
+            self.aggregation.async_start()
+        self._consumer = asyncio.create_task(self.consume())
         while self.running:
-            if self.econest_energy.econest_type == "serial_number":
-                url = self.websocket_url.format(self.econest_energy.serial_number_name, self.uuid)
-            elif self.econest_energy.econest_type == "serial_number_local":
-                url = self.websocket_url.format(self.econest_energy.serial_number_name + ".local", self.uuid)
-            else:
-                url = self.websocket_url.format(self.host, self.uuid)
+            stalled = False
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.ws_connect(url) as ws:
-                        self.ws = ws
-                        _LOGGER.info("WebSocket connection established")
-
-                        async def send_heartbeat():
-                            while self.running:
-                                try:
-                                    await ws.ping()
-                                    _LOGGER.debug("Heartbeat sent")
-                                except Exception as e:
-                                    _LOGGER.error("Failed to send heartbeat: %s", e)
-                                    break
-                                await asyncio.sleep(10)
-
-                        heartbeat_task = asyncio.create_task(send_heartbeat())
+                if self.econest_energy.endpoint is None:
+                    await self.econest_energy.resolve_endpoint(self.host)
+                url = self.websocket_url.format(self.econest_energy.endpoint or self.host, self.uuid)
+                async with self.connect_slot():
+                    ws = await self.econest_energy.session.ws_connect(
+                        url, heartbeat=HEARTBEAT_INTERVAL, timeout=WS_TIMEOUT)
+                async with ws:
+                    self.ws = ws
+                    _LOGGER.info("WebSocket connection established")
+                    if self._connections:
+                        self.stats.reconnects += 1
+                    self._connections += 1
+                    self._failures = 0
+                    self._new_connection = True
+                    self._integrity_failures = 0
+                    last_frame = None
+                    while self.running:
+                        timeout = self.stall_timeout()
                         try:
-                            async for msg in ws:
-                                if not self.running:
-                                    break
-                                if msg.type == aiohttp.WSMsgType.BINARY:
-                                    await self.handle_message(msg.data)
-                                elif msg.type == aiohttp.WSMsgType.ERROR:
-                                    _LOGGER.error("WebSocket error: %s", msg.data)
-                        finally:
-                            _LOGGER.debug("task cancel")
-                            heartbeat_task.cancel()
+                            msg = await ws.receive(timeout=timeout)
+                        except asyncio.TimeoutError:
+                            _LOGGER.warning("No data for %.1f seconds, reconnecting", timeout)
+                            self.stats.stalls += 1
+                            stalled = True
+                            break
+                        if msg.type == aiohttp.WSMsgType.BINARY:
+                            now = time.monotonic()
+                            if last_frame is not None:
+                                self.observe_frame_interval(now - last_frame)
+                            last_frame = self.stats.last_frame = now
+                            if self.recorder:
+                                self.recorder.record(msg.data)
+                            self.frames.put(msg.data)
+                        elif msg.type == aiohttp.WSMsgType.ERROR:
+                            _LOGGER.error("WebSocket error: %s", msg.data)
+                        elif msg.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSING,
+                                          aiohttp.WSMsgType.CLOSED):
+                            break
+            except aiohttp.WSServerHandshakeError as e:
+                if e.status in UUID_REJECTED:
+                    _LOGGER.info("WebSocket resume rejected (%s), registering again", e.status)
+                    if await self.econest_energy.handshake(self.host):
+                        self.uuid = self.econest_energy.uuid
+                else:
+                    _LOGGER.error("WebSocket upgrade refused: %s", e.status)
             except aiohttp.ClientError as e:
                 _LOGGER.error("WebSocket connection failed: %s", e)
+                self.econest_energy.endpoint = None
             except asyncio.CancelledError:
                 _LOGGER.info("WebSocket connection canceled")
                 break
@@ -94,149 +211,285 @@ class WebSocketSensorManager:
                 _LOGGER.error("Unexpected error: %s", e)
                 if not self.running:
                     break
-            if self.running:
-                _LOGGER.info("Attempting to reconnect in 10 seconds...")
-                await asyncio.sleep(10)
+            if self._reconnect.is_set():
+                self._reconnect.clear()
+                continue
+            if self.running and not stalled:
+                delay = reconnect_delay(self._failures)
+                self._failures += 1
+                _LOGGER.info("Attempting to reconnect in %.1f seconds...", delay)
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._reconnect.wait(), delay)
+                self._reconnect.clear()
+
+    def observe_frame_interval(self, interval):
+        """Track a moving average of the device's frame interval"""
+        if self._frame_interval is None:
+            self._frame_interval = interval
+        else:
+            self._frame_interval += (interval - self._frame_interval) / 8
+
+    def stall_timeout(self):
+        """Seconds without a frame after which the connection is considered stalled"""
+        if self._frame_interval is None:
+            return MAX_STALL_TIMEOUT
+        return min(MAX_STALL_TIMEOUT, max(MIN_STALL_TIMEOUT, STALL_FACTOR * self._frame_interval))
+
+    def set_host(self, host):
+        """Move to a new device address and reconnect right away with the cached uuid"""
+        if host == self.host:
+            return
+        _LOGGER.info("Device moved to %s, reconnecting", host)
+        self.host = host
+        if self.backfill:
+            self.backfill.host = host
+        self._failures = 0
+        self._reconnect.set()
+        if self.ws is not None and not self.ws.closed:
+            self.hass.async_create_task(self.ws.close())
+
+    def connect_slot(self):
+        """Wait for the hub to allow a connection attempt"""
+        if self.hub is None:
+            return contextlib.nullcontext()
+        return self.hub.connect_slot()
 
     def stop(self):
         self.running = False
+        if self.publisher:
+            self.publisher.async_stop()
+        if self.aggregation:
+            self.aggregation.async_stop()
+        if self._consumer:
+            self._consumer.cancel()
+        if self.recorder:
+            self.hass.async_create_task(self.recorder.async_close())
+        if self.backfill:
+            self.backfill.async_cancel()
         if self.ws:
             asyncio.create_task(self.ws.close())
 
+    async def consume(self):
+        """Process queued frames until stopped"""
+        while self.running:
+            data = await self.frames.get()
+            start = time.perf_counter()
+            try:
+                await self.handle_message(data)
+            except Exception as e:
+                _LOGGER.error("Failed to process frame: %s", e)
+            self.stats.handle_time.record(time.perf_counter() - start)
+
     async def handle_message(self, data):
         """Processing WebSocket messages"""
-        analysis_device_data = self.analysis_data(data)
-        if analysis_device_data:
-            device_datas = {"main": analysis_device_data["sampleDataWsPayload"]["mainChData"],
-                            "sub": analysis_device_data["sampleDataWsPayload"]["subDevChData"]}
-
-            for device_type, device_data in device_datas.items():
-                if device_type == "main":
-                    self.add_sensor(device_data, "ecoMain")
-                else:
-                    for ind, sub_data in enumerate(device_data):
-                        for ch_ind, ch_data in enumerate(sub_data["chDatas"]):
-                            sub_ch_name = "ecoSub_" + str(ind) + "-channel_" + str(ch_ind + 1)
-                            self.add_sensor(ch_data, sub_ch_name)
-
-    def add_sensor(self, data, device_type):
-        """Create sensors"""
-        for key, value in data.items():
-            sensor_name = f"{device_type}-{key}"
+        start = time.perf_counter()
+        try:
+            frame = self.analysis_data(data)
+        except InvalidFrame as err:
+            self.stats.frames_invalid += 1
+            _LOGGER.debug("Dropped invalid frame: %s", err)
+            self.integrity_failed(data)
+            return
+        finally:
+            self.stats.decode_time.record(time.perf_counter() - start)
+        if frame is None or (frame.packet_type != SAMPLE_DATA_TYPE and self.log_buffer is None):
+            self.stats.frames_skipped += 1
+            return
+        self.stats.frames_decoded += 1
+        if frame.packet_type != SAMPLE_DATA_TYPE:
+            # Log records are kept for queries, not mirrored as state writes
+            self.log_buffer.append(frame)
+            return
+        if self._new_connection:
+            self._new_connection = False
+            if self.backfill:
+                self.backfill.async_schedule(frame.timestamp)
+        self.econest_energy.set_last_timestamp(frame.timestamp)
+        if frame.layout is not self._layout:
+            self.build_routes(frame.layout)
+        # Whole frame to subscribers first, ahead of the per-entity state writes
+        async_dispatcher_send(self.hass, self.signal, FrameSnapshot(self.econest_energy.serial_number_name, frame))
+        fields = frame.fields
+        self.activity.observe(frame.timestamp, fields)
+        if self.aggregation:
+            self.aggregation.add(frame.timestamp, fields)
+        publish = self.publisher.submit if self.publisher else self.publish
+        for sensor, index in self._routes:
+            publish(sensor, fields[index])
+
+    def build_routes(self, layout):
+        """Map every slot of a frame layout to its sensor, creating new ones in one batch"""
+        new_sensors = []
+        routes = tuple(
+            (self.add_sensor(sensor_name, new_sensors), index) for sensor_name, index in layout.slots
+        )
+        if self.aggregation:
+            # Power is published as window aggregates, only the rest per frame
+            power, other = [], []
+            for route, (sensor_name, _) in zip(routes, layout.slots):
+                (power if sensor_name.endswith("-Power") else other).append(route)
+            self.aggregation.set_routes(power)
+            routes = tuple(other)
+        self._routes = routes
+        self._layout = layout
+        self.activity.set_layout(layout)
+        if new_sensors:
+            self.async_add_entities(new_sensors)
+
+    def add_known_sensors(self):
+        """Create the sensors seen in earlier runs in one batch"""
+        new_sensors = []
+        for sensor_name in self.econest_energy.known_sensors:
             if sensor_name not in self.sensors:
                 new_sensor = EconestSensor(self.econest_energy, sensor_name)
                 self.sensors[sensor_name] = new_sensor
-                self.async_add_entities([new_sensor])
-            self.sensors[sensor_name].update_state(value)
+                new_sensors.append(new_sensor)
+        if new_sensors:
+            self.async_add_entities(new_sensors)
+
+    def add_sensor(self, sensor_name, new_sensors):
+        """Return a sensor, collecting new ones to register as one batch"""
+        sensor = self.sensors.get(sensor_name)
+        if sensor is None:
+            sensor = EconestSensor(self.econest_energy, sensor_name)
+            self.sensors[sensor_name] = sensor
+            new_sensors.append(sensor)
+            self.econest_energy.add_known_sensor(sensor_name)
+        return sensor
+
+    def publish(self, sensor, value):
+        """Write a sensor state unless the filter suppresses it"""
+        if self.state_filter.accept(sensor, value):
+            sensor.update_state(value)
+
+    def diagnostics(self):
+        """Return the performance counters of this manager"""
+        return {
+            "frames_received": self.frames.received,
+            "frames_dropped": self.frames.dropped,
+            "queue_depth": self.frames.depth,
+            "state_writes": self.state_filter.state_writes,
+            "aggregate_writes": self.aggregation.state_writes if self.aggregation else None,
+            "suppressed_writes": self.state_filter.suppressed_writes,
+            "sensors": len(self.sensors),
+            "log_buffer": self.log_buffer.as_dict() if self.log_buffer else None,
+            **self.stats.as_dict(),
+        }
 
     def analysis_data(self, data):
         """Analyze complete data"""
-        offset = 0
-        econest_ws_pkg_head_format = "<IIII"  # version, crc, type, length
-        econest_ws_pkg_head_size = struct.calcsize(econest_ws_pkg_head_format)
-        version, crc, type_, length = struct.unpack_from(econest_ws_pkg_head_format, data, offset)
-        offset += econest_ws_pkg_head_size
-        if type_ != 2:
-            return None
-        econestWsPkgHead = {
-            "version": version,
-            "crc": crc,
-            "type": type_,
-            "length": length,
-        }
-
-        # sampleDataWsPayload
-        sample_data_ws_payload_format = "<IB"  # timeStamp, subDevNum
-        sample_data_ws_payload_size = struct.calcsize(sample_data_ws_payload_format)
-        timeStamp, subDevNum = struct.unpack_from(sample_data_ws_payload_format, data, offset)
-        # subDevNum = 2
-        offset += sample_data_ws_payload_size
-
-        # mainChData
-        main_ch_data_format = "<iI"  # Power, Energy
-        main_ch_data_size = struct.calcsize(main_ch_data_format)
-        main_power, main_energy = struct.unpack_from(main_ch_data_format, data, offset)
-        offset += main_ch_data_size
-
-        mainChData = {
-            "Power": main_power,
-            "Energy": main_energy,
-        }
-
-        # subDevChData
-        subDevChData = []
-        for _ in range(1, subDevNum + 1):
-            sub_dev_number_format = "<B"  # number
-            sub_dev_number_size = struct.calcsize(sub_dev_number_format)
-            number = struct.unpack_from(sub_dev_number_format, data, offset)[0]
-            offset += sub_dev_number_size
-            ch_data_format = "<iI"  # Power, Energy
-            ch_data_size = struct.calcsize(ch_data_format)
-            chDatas = []
-            for _ in range(10):
-                power, energy = struct.unpack_from(ch_data_format, data, offset)
-                offset += ch_data_size
-                chDatas.append({
-                    "Power": power,
-                    "Energy": energy,
-                })
-
-            subDevChData.append({
-                "number": number,
-                "chDatas": chDatas,
-            })
-
-        sampleDataWsPayload = {
-            "timeStamp": timeStamp,
-            "subDevNum": subDevNum,
-            "mainChData": mainChData,
-            "subDevChData": subDevChData,
-        }
-
-        res = {
-            "econestWsPkgHead": econestWsPkgHead,
-            "sampleDataWsPayload": sampleDataWsPayload,
-        }
-        return res
-
-
-class EconestSensor(Entity):
-    """Representation of a Sensor."""
-
-    device_class = SensorDeviceClass.POWER
-
-    _attr_unit_of_measurement = UnitOfPower.WATT
+        frame = decode_packet(data, self.disabled_channels, self.verify_crc)
+        self._integrity_failures = 0
+        return frame
+
+    def integrity_failed(self, data):
+        """Warn about a run of frames that only fail the length or crc check
+
+        The frames stay dropped, a link flipping payload bits looks the same
+        as firmware with another convention.
+        """
+        try:
+            decode_packet(data, self.disabled_channels, verify_crc=False)
+        except InvalidFrame:
+            return  # Corrupt beyond its header, not a firmware convention
+        self._integrity_failures += 1
+        if self._integrity_failures == MAX_INTEGRITY_FAILURES:
+            _LOGGER.warning(
+                "%s frames in a row from %s failed the length or crc check but match their layout "
+                "and are dropped. Turn off the verify_crc option if the firmware uses another crc "
+                "or length convention",
+                self._integrity_failures, self.econest_energy.serial_number_name)
+
+
+def econest_device_info(econest_energy):
+    """Return the device info shared by all sensors of a device"""
+    return {"identifiers": {(DOMAIN, econest_energy.serial_number_name)},
+            "name": econest_energy.serial_number_name,
+            "manufacturer": "Econest",
+            "model": "Econest"}
+
+
+class EconestSensor(SensorEntity):
+    """Power or energy reading of a device channel.
+
+    Everything but the value is fixed at construction, so a state write
+    only has to render the value.
+    """
+
+    _attr_should_poll = False
 
     def __init__(self, econest_energy, sensor_name):
         """Initialize the sensor."""
-        self._sensor_name = sensor_name
-        self._state = None
-        self._econest_energy = econest_energy
-
-    @property
-    def device_info(self):
-        return {"identifiers": {(DOMAIN, self._econest_energy.serial_number_name)},
-                "name": self._econest_energy.serial_number_name,
-                "manufacturer": "Econest",
-                "model": "Econest"}
+        self._attr_name = sensor_name
+        self._attr_unique_id = f"{econest_energy.serial_number_name}_{sensor_name}"
+        self._attr_device_info = econest_device_info(econest_energy)
+        if sensor_name.endswith("-Energy"):
+            self._attr_device_class = SensorDeviceClass.ENERGY
+            self._attr_state_class = SensorStateClass.TOTAL_INCREASING
+            self._attr_native_unit_of_measurement = UnitOfEnergy.WATT_HOUR
+            self._attr_suggested_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
+        else:
+            self._attr_device_class = SensorDeviceClass.POWER
+            self._attr_state_class = SensorStateClass.MEASUREMENT
+            self._attr_native_unit_of_measurement = UnitOfPower.WATT
+        self._added = False
+
+    async def async_added_to_hass(self):
+        """Allow state writes once the entity is registered."""
+        self._added = True
+
+    async def async_will_remove_from_hass(self):
+        """Stop state writes once the entity is removed."""
+        self._added = False
+
+    def update_state(self, value, attributes=None):
+        """Update sensor status"""
+        self._attr_native_value = value
+        if attributes is not None:
+            # Window aggregates of an aggregated power sensor
+            self._attr_extra_state_attributes = attributes
+        # Not added yet, the state is written once the entity is registered
+        if self._added:
+            self.async_write_ha_state()
+
+
+# key, unit, value getter
+DIAGNOSTIC_SENSORS = (
+    ("frames_received", None, lambda manager: manager.frames.received),
+    ("frames_dropped", None, lambda manager: manager.frames.dropped),
+    ("frames_skipped", None, lambda manager: manager.stats.frames_skipped),
+    ("frames_invalid", None, lambda manager: manager.stats.frames_invalid),
+    ("state_writes", None, lambda manager: manager.state_filter.state_writes),
+    ("suppressed_writes", None, lambda manager: manager.state_filter.suppressed_writes),
+    ("reconnects", None, lambda manager: manager.stats.reconnects),
+    ("stalls", None, lambda manager: manager.stats.stalls),
+    ("log_records", None, lambda manager: manager.log_buffer.records if manager.log_buffer else None),
+    ("decode_time", UnitOfTime.MICROSECONDS,
+     lambda manager: manager.stats.decode_time.mean and round(manager.stats.decode_time.mean * 1e6, 2)),
+    ("handle_time", UnitOfTime.MICROSECONDS,
+     lambda manager: manager.stats.handle_time.mean and round(manager.stats.handle_time.mean * 1e6, 2)),
+    ("last_frame_age", UnitOfTime.SECONDS,
+     lambda manager: manager.stats.last_frame_age and round(manager.stats.last_frame_age, 1)),
+)
 
-    @property
-    def unique_id(self):
-        """Return unique identifier"""
-        return f"{self._econest_energy.serial_number_name}_{self._sensor_name}"
 
-    @property
-    def name(self):
-        """Return the name of the sensor"""
-        return self._sensor_name
+class EconestDiagnosticSensor(SensorEntity):
+    """Performance counter of a WebSocketSensorManager, polled and disabled by default."""
 
-    @property
-    def state(self):
-        """Return the state of the sensor."""
-        return self._state
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_should_poll = True
 
-    def update_state(self, value):
-        """Update sensor status"""
-        self._state = value
-        self.async_write_ha_state()
+    def __init__(self, econest_energy, sensor_manager, key, unit, value):
+        """Initialize the sensor."""
+        self._sensor_manager = sensor_manager
+        self._value = value
+        self._attr_name = f"diagnostic-{key}"
+        self._attr_unique_id = f"{econest_energy.serial_number_name}_diagnostic_{key}"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_state_class = SensorStateClass.MEASUREMENT if unit else SensorStateClass.TOTAL_INCREASING
+        self._attr_device_info = econest_device_info(econest_energy)
 
+    @property
+    def native_value(self):
+        return self._value(self._sensor_manager)
@@ -0,0 +1,65 @@
+"""Whole-frame snapshots for other components.
+
+Every decoded sample frame is sent once on the device's dispatcher signal,
+so a consumer sees main and all channels of one device timestamp together
+instead of reassembling them from per-entity state changes.
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import NamedTuple
+
+from .const import SIGNAL_FRAME
+from .decoder import FrameLayout, SampleFrame, channel_name
+
+
+def signal_frame(serial_number_name: str) -> str:
+    """Return the dispatcher signal carrying the FrameSnapshots of a device."""
+    return SIGNAL_FRAME.format(serial_number_name)
+
+
+@lru_cache(maxsize=None)
+def _channel_slots(layout: FrameLayout) -> tuple[tuple[str, int], ...]:
+    """(channel name, Power field position) of the enabled channels of a layout."""
+    return tuple(
+        (channel_name(sub_ind, ch_ind), index)
+        for (sub_ind, ch_ind), index in layout.channel_index.items()
+    )
+
+
+class FrameSnapshot(NamedTuple):
+    """One sample frame of a device, shared read-only by every subscriber.
+
+    Readings are taken from the decoded frame on access, so publishing a
+    snapshot costs nothing when no one looks at it.
+    """
+
+    device: str
+    frame: SampleFrame
+
+    @property
+    def timestamp(self) -> int:
+        """Device timeStamp of the frame."""
+        return self.frame.timestamp
+
+    @property
+    def main(self) -> tuple[int, int]:
+        """(Power, Energy) of the main meter."""
+        return self.frame.main_power, self.frame.main_energy
+
+    def channels(self) -> dict[str, tuple[int, int]]:
+        """Return {channel name: (Power, Energy)} of every enabled sub device channel."""
+        fields = self.frame.fields
+        return {
+            name: (fields[index], fields[index + 1])
+            for name, index in _channel_slots(self.frame.layout)
+        }
+
+    def as_dict(self) -> dict:
+        """Return the snapshot as JSON-serializable data."""
+        return {
+            "device": self.device,
+            "timestamp": self.timestamp,
+            "main": self.main,
+            "channels": self.channels(),
+        }
@@ -0,0 +1,59 @@
+"""Change detection and deadband filtering of sensor state writes."""
+from __future__ import annotations
+
+import time
+
+from .const import (
+    CONF_DEADBAND_ABSOLUTE,
+    CONF_DEADBAND_PERCENT,
+    CONF_MAX_SILENCE,
+    DEFAULT_DEADBAND_ABSOLUTE,
+    DEFAULT_DEADBAND_PERCENT,
+    DEFAULT_MAX_SILENCE,
+)
+
+
+class StateFilter:
+    """Keep the last published value per sensor and drop redundant writes.
+
+    Deadbands only apply to Power readings. Energy readings are cumulative
+    counters, a band relative to the total or in W would hold back real
+    consumption, so they are only filtered for unchanged values.
+    """
+
+    def __init__(self, deadband_absolute=0, deadband_percent=0, max_silence=None):
+        self.deadband_absolute = deadband_absolute
+        self.deadband_percent = deadband_percent
+        self.max_silence = max_silence
+        self.published = {}
+        self.state_writes = 0
+        self.suppressed_writes = 0
+
+    @classmethod
+    def from_options(cls, options):
+        """Create a filter from config entry options."""
+        return cls(
+            options.get(CONF_DEADBAND_ABSOLUTE, DEFAULT_DEADBAND_ABSOLUTE),
+            options.get(CONF_DEADBAND_PERCENT, DEFAULT_DEADBAND_PERCENT),
+            options.get(CONF_MAX_SILENCE, DEFAULT_MAX_SILENCE),
+        )
+
+    def accept(self, sensor, value, now=None):
+        """Return True if value should be written, recording it as published."""
+        if now is None:
+            now = time.monotonic()
+        last = self.published.get(sensor)
+        if last is not None:
+            last_value, last_time, banded = last
+            silence_expired = self.max_silence and now - last_time >= self.max_silence
+            if not silence_expired:
+                delta = abs(value - last_value)
+                if delta == 0 or (banded and delta <= max(
+                        self.deadband_absolute, abs(last_value) * self.deadband_percent / 100)):
+                    self.suppressed_writes += 1
+                    return False
+        else:
+            banded = not sensor.name.endswith("-Energy")
+        self.published[sensor] = (value, now, banded)
+        self.state_writes += 1
+        return True
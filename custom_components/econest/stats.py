@@ -0,0 +1,75 @@
+"""Cheap always-on performance counters for a WebSocketSensorManager."""
+from __future__ import annotations
+
+import time
+from bisect import bisect_left
+
+# Histogram bucket upper bounds in microseconds, the last bucket is open
+BUCKETS_US = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 100000)
+_BOUNDS = tuple(bound / 1e6 for bound in BUCKETS_US)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.counts[bisect_left(_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    @property
+    def mean(self) -> float | None:
+        return self.total / self.count if self.count else None
+
+    def as_dict(self) -> dict:
+        buckets = {f"<={bound}us": count for bound, count in zip(BUCKETS_US, self.counts)}
+        buckets[f">{BUCKETS_US[-1]}us"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean_us": round(self.mean * 1e6, 2) if self.count else None,
+            "max_us": round(self.max * 1e6, 2),
+            "buckets": buckets,
+        }
+
+
+class ManagerStats:
+    """Counters and latencies of frame processing."""
+
+    def __init__(self) -> None:
+        self.frames_decoded = 0
+        self.frames_skipped = 0
+        self.frames_invalid = 0
+        self.reconnects = 0
+        self.stalls = 0
+        self.last_frame = None
+        self.decode_time = LatencyHistogram()
+        self.handle_time = LatencyHistogram()
+
+    @property
+    def last_frame_age(self) -> float | None:
+        """Seconds since the last frame was received."""
+        if self.last_frame is None:
+            return None
+        return time.monotonic() - self.last_frame
+
+    def as_dict(self) -> dict:
+        return {
+            "frames_decoded": self.frames_decoded,
+            "frames_skipped": self.frames_skipped,
+            "frames_invalid": self.frames_invalid,
+            "reconnects": self.reconnects,
+            "stalls": self.stalls,
+            "last_frame_age": self.last_frame_age,
+            "decode_time": self.decode_time.as_dict(),
+            "handle_time": self.handle_time.as_dict(),
+        }
@@ -0,0 +1,89 @@
+"""Websocket API for the decoded frames and log records of a device."""
+from __future__ import annotations
+
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+
+from .const import DOMAIN
+from .snapshot import FrameSnapshot, signal_frame
+
+
+@callback
+def async_setup(hass: HomeAssistant) -> None:
+    """Register the econest websocket commands."""
+    websocket_api.async_register_command(hass, ws_subscribe_frames)
+    websocket_api.async_register_command(hass, ws_log_records)
+
+
+def _sensor_manager(hass: HomeAssistant, device: str):
+    """Return the running sensor manager of a device, None if it is not loaded."""
+    for sensor_manager in hass.data.get(DOMAIN, {}).values():
+        if sensor_manager.econest_energy.serial_number_name == device:
+            return sensor_manager
+    return None
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "econest/subscribe_frames",
+        vol.Required("device"): str,
+    }
+)
+@callback
+def ws_subscribe_frames(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Send every decoded frame of a device as an event until unsubscribed."""
+    device = msg["device"]
+    if _sensor_manager(hass, device) is None:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, f"Unknown device {device}")
+        return
+
+    @callback
+    def forward(snapshot: FrameSnapshot) -> None:
+        connection.send_message(websocket_api.event_message(msg["id"], snapshot.as_dict()))
+
+    connection.subscriptions[msg["id"]] = async_dispatcher_connect(hass, signal_frame(device), forward)
+    connection.send_result(msg["id"])
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "econest/log_records",
+        vol.Required("device"): str,
+        vol.Optional("sensor"): str,
+        vol.Optional("start", default=0): vol.Coerce(int),
+        vol.Optional("end"): vol.Coerce(int),
+    }
+)
+@callback
+def ws_log_records(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Return the log buffer of a device.
+
+    With a sensor, its (timestamp, value) records for start <= timestamp < end,
+    otherwise the newest record with all its readings.
+    """
+    device = msg["device"]
+    sensor_manager = _sensor_manager(hass, device)
+    if sensor_manager is None:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, f"Unknown device {device}")
+        return
+    log_buffer = sensor_manager.log_buffer
+    if log_buffer is None:
+        connection.send_error(
+            msg["id"], websocket_api.ERR_NOT_SUPPORTED, f"Log data is not enabled for {device}")
+        return
+    result = {"buffer": log_buffer.as_dict()}
+    if "sensor" in msg:
+        result["records"] = log_buffer.series(msg["sensor"], msg["start"], msg.get("end"))
+    else:
+        latest = log_buffer.latest()
+        result["latest"] = None if latest is None else {"timestamp": latest[0], "readings": latest[1]}
+    connection.send_result(msg["id"], result)